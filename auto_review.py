@@ -6,27 +6,51 @@ Provides a seamless workflow for code review automation.
 
 import os
 import sys
-import subprocess
 import argparse
 from pathlib import Path
 from diff_generator_agent import DiffGeneratorAgent
 from llm_providers.factory import LLMProviderFactory
+from eng_manager_review_agent import main as run_review_main, main_from_dict
+from json_utils import dumps_json, loads_json
 
 
 def run_code_review(diff_file: str, provider: str, model: str = None, **kwargs):
-    """Run the code review agent with the generated diff file."""
-    cmd = ["python", "eng_manager_review_agent.py", diff_file, provider]
-    if model:
-        cmd.append(model)
-    
+    """Run the code review agent in-process on an existing diff file."""
+    try:
+        print("=== CODE REVIEW RESULTS ===")
+        run_review_main(diff_file, provider, model, **kwargs)
+        return True
+    except Exception as e:
+        print(f"Error running code review: {e}")
+        return False
+
+
+def run_code_review_from_dict(files: dict, provider: str, model: str = None, **kwargs):
+    """Run the code review agent in-process on already generated diffs."""
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
         print("=== CODE REVIEW RESULTS ===")
-        print(result.stdout)
+        main_from_dict(files, provider, model, **kwargs)
         return True
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"Error running code review: {e}")
-        print(f"stderr: {e.stderr}")
+        return False
+
+
+def run_code_review_via_daemon(files: dict, provider: str, model: str = None, socket_path: str = None,
+                               cache_dir: str = None, compact: bool = False, **kwargs):
+    """Send diffs to the long-lived review daemon, starting it first if needed."""
+    from review_daemon import DEFAULT_SOCKET_PATH, ensure_daemon, request_review
+    socket_path = socket_path or DEFAULT_SOCKET_PATH
+    try:
+        ensure_daemon(provider, model, socket_path=socket_path, cache_dir=cache_dir)
+        if cache_dir is not None:
+            kwargs["cache_dir"] = cache_dir
+        result = request_review(files, socket_path, provider=provider, model=model, **kwargs)
+        print("=== CODE REVIEW RESULTS ===")
+        print(dumps_json(result, compact=compact).decode("utf-8"))
+        return True
+    except Exception as e:
+        print(f"Error running code review via daemon: {e}")
         return False
 
 
@@ -81,6 +105,20 @@ Examples:
         '--commit-hash',
         help='Commit hash for commit mode'
     )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='Glob of files to skip, in addition to lockfiles and generated files (repeatable)'
+    )
+    parser.add_argument(
+        '--context',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Unchanged context lines around each change (default: 1)'
+    )
     
     # Code review arguments
     parser.add_argument(
@@ -93,6 +131,30 @@ Examples:
         '--model',
         help='Model name (e.g., gpt-4, gemini-pro, deepseek-r1)'
     )
+    parser.add_argument(
+        '--cache-dir',
+        default='.review_cache',
+        help='Directory for cached LLM reviews, empty to disable (default: .review_cache)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the review cache'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Emit compact JSON instead of pretty-printing it'
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Send the review to a long-lived review daemon, starting one if none is running'
+    )
+    parser.add_argument(
+        '--socket',
+        help='Review daemon socket path (default: ~/.em_agentic_review.sock)'
+    )
     parser.add_argument(
         '--skip-diff-generation',
         action='store_true',
@@ -110,6 +172,8 @@ Examples:
     )
     
     args = parser.parse_args()
+    if args.no_cache:
+        args.cache_dir = ''
     
     # List providers if requested
     if args.list_providers:
@@ -122,10 +186,13 @@ Examples:
         return
     
     try:
-        # Step 1: Generate diff.json (unless skipped)
+        # Step 1: Generate diffs (unless skipped). When reviewing, they stay
+        # in memory; diff.json is only written for --skip-review.
+        files = None
         if not args.skip_diff_generation:
             print("=== GENERATING DIFF ===")
-            agent = DiffGeneratorAgent(args.repo_path)
+            agent = DiffGeneratorAgent(args.repo_path, exclude_patterns=args.exclude,
+                                       context_lines=args.context)
             
             kwargs = {
                 'mode': args.mode,
@@ -134,10 +201,17 @@ Examples:
                 'commit_hash': args.commit_hash
             }
             
-            success = agent.generate_diff_json(args.output, **kwargs)
-            if not success:
-                print("Failed to generate diff.json")
-                sys.exit(1)
+            if args.skip_review:
+                success = agent.generate_diff_json(args.output, compact=args.compact, **kwargs)
+                if not success:
+                    print("Failed to generate diff.json")
+                    sys.exit(1)
+            else:
+                files = agent.get_diffs_dict(**kwargs)
+                if not files:
+                    print("No changes found to review")
+                    sys.exit(1)
+                print(f"Collected diffs for {len(files)} files")
         else:
             if not os.path.exists(args.output):
                 print(f"Error: {args.output} not found. Use --skip-diff-generation only if the file exists.")
@@ -147,7 +221,23 @@ Examples:
         # Step 2: Run code review (unless skipped)
         if not args.skip_review:
             print("\n=== RUNNING CODE REVIEW ===")
-            success = run_code_review(args.output, args.provider, args.model)
+            if args.daemon:
+                if files is None:
+                    with open(args.output, "rb") as f:
+                        files = loads_json(f.read()).get("files", {})
+                success = run_code_review_via_daemon(
+                    files, args.provider, args.model, socket_path=args.socket,
+                    cache_dir=args.cache_dir, compact=args.compact,
+                    repo_path=os.path.abspath(args.repo_path)
+                )
+            elif files is not None:
+                success = run_code_review_from_dict(
+                    files, args.provider, args.model,
+                    repo_path=args.repo_path, cache_dir=args.cache_dir, compact=args.compact
+                )
+            else:
+                success = run_code_review(args.output, args.provider, args.model, cache_dir=args.cache_dir,
+                                          compact=args.compact)
             if not success:
                 print("Code review failed")
                 sys.exit(1)
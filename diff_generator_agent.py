@@ -6,32 +6,220 @@ Supports various git scenarios: branch comparison, commit comparison, staged cha
 
 import os
 import sys
-import json
+import tempfile
 import subprocess
 import argparse
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from json_utils import dumps_json
+
+# Optional: in-process git via libgit2 (falls back to the git CLI)
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+# Lockfiles, minified bundles and generated artifacts that are not worth an LLM review.
+# Patterns without a "/" match the file name anywhere in the tree.
+DEFAULT_EXCLUDE_PATTERNS = [
+    "*.lock",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "go.sum",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.svg",
+    "*.pb",
+    "*.pb.go",
+    "*_pb2.py",
+]
+
+
+# Byte values of the single-character escapes git uses in quoted paths
+_C_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13, '"': 34, "\\": 92}
+
+
+def unquote_git_path(path: str) -> str:
+    """Undo git's C-style quoting of a path ("a\\tb\\303\\251" -> a<TAB>bé); unquoted paths pass through."""
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+    raw = bytearray()
+    i, end = 1, len(path) - 1
+    while i < end:
+        char = path[i]
+        if char == "\\" and i + 1 < end:
+            escaped = path[i + 1]
+            if escaped in "01234567":
+                # Octal escape for one byte of a UTF-8 sequence
+                raw.append(int(path[i + 1:i + 4], 8))
+                i += 4
+            else:
+                raw.append(_C_ESCAPES.get(escaped, ord(escaped)))
+                i += 2
+        else:
+            raw += char.encode("utf-8")
+            i += 1
+    return raw.decode("utf-8", errors="replace")
+
+
+def _strip_prefix(path: str, prefix: str) -> str:
+    path = unquote_git_path(path)
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def _patch_file_path(patch_lines: List[str]) -> str:
+    """
+    Path a per-file patch is keyed by: the post-image path, or the pre-image
+    path for deletions (matching pygit2's delta.new_file.path).
+    
+    Taken from the "+++"/"---"/"rename to" lines, which hold exactly one path,
+    rather than from the "diff --git a/X b/Y" header, which is ambiguous when
+    paths contain spaces.
+    """
+    new_path = old_path = renamed_to = None
+    for line in patch_lines[1:]:
+        if line.startswith("@@"):
+            break
+        line = line.rstrip("\n")
+        if line.startswith("+++ ") or line.startswith("--- "):
+            # git ends names containing spaces with a tab
+            name = line[4:]
+            if name.endswith("\t"):
+                name = name[:-1]
+            if name != "/dev/null":
+                if line.startswith("+++ "):
+                    new_path = _strip_prefix(name, "b/")
+                else:
+                    old_path = _strip_prefix(name, "a/")
+        elif line.startswith("rename to ") or line.startswith("copy to "):
+            renamed_to = unquote_git_path(line.split(" to ", 1)[1])
+    if new_path or renamed_to or old_path:
+        return new_path or renamed_to or old_path
+    
+    # Header only (binary or mode-only change): "a/X b/X" splits unambiguously in half
+    header = patch_lines[0].rstrip("\n")[len("diff --git "):]
+    if header.endswith('"'):
+        return _strip_prefix(header[header.rfind(' "') + 1:], "b/")
+    half = (len(header) - 5) // 2
+    if header.startswith("a/") and header[half + 2:half + 5] == " b/" and header[2:half + 2] == header[half + 5:]:
+        return header[half + 5:]
+    return _strip_prefix(header.rsplit(" ", 1)[-1], "b/")
+
+
+def is_skipped_file(file_path: str, diff: str, patterns: List[str]) -> bool:
+    """Return True for excluded paths and binary diffs that should not be reviewed."""
+    name = os.path.basename(file_path)
+    for pattern in patterns:
+        if fnmatch(file_path if "/" in pattern else name, pattern):
+            return True
+    head = diff[:200]
+    return "Binary files" in head or "GIT binary patch" in head
 
 
 class DiffGeneratorAgent:
-    def __init__(self, repo_path: str = "."):
+    def __init__(self, repo_path: str = ".", exclude_patterns: Optional[List[str]] = None,
+                 context_lines: int = 3):
         self.repo_path = Path(repo_path).resolve()
+        self.exclude_patterns = DEFAULT_EXCLUDE_PATTERNS + list(exclude_patterns or [])
+        self.context_lines = context_lines
+        self._discover_repo()
         if not self.is_git_repo():
             raise ValueError(f"Not a git repository: {self.repo_path}")
+        self.repo = pygit2.Repository(str(self._git_dir)) if pygit2 else None
     
-    def is_git_repo(self) -> bool:
-        """Check if the given path is a git repository."""
+    def _discover_repo(self) -> None:
+        """Resolve the worktree root, common git dir and git dir with a single rev-parse call."""
+        self._toplevel = self._git_common_dir = self._git_dir = None
         try:
             result = subprocess.run(
-                ["git", "rev-parse", "--git-dir"],
+                ["git", "rev-parse", "--show-toplevel", "--git-common-dir", "--git-dir"],
                 cwd=self.repo_path,
                 capture_output=True,
-                text=True,
                 check=True
             )
-            return True
         except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+            return
+        lines = result.stdout.decode('utf-8', errors='replace').splitlines()
+        if len(lines) != 3:
+            return
+        # --git-common-dir and --git-dir may be relative to the working directory
+        self._toplevel = Path(lines[0])
+        self._git_common_dir = (self.repo_path / lines[1]).resolve()
+        self._git_dir = (self.repo_path / lines[2]).resolve()
+    
+    def is_git_repo(self) -> bool:
+        """Check if the given path is a git repository."""
+        return self._git_dir is not None
+    
+    def _git(self, *args: str) -> List[str]:
+        """
+        Build a git command with explicit dirs so git skips repository discovery.
+        Paths are printed unescaped (core.quotepath=off) with the standard a/ b/
+        prefixes whatever the user's diff config says.
+        """
+        return [
+            "git", f"--git-dir={self._git_dir}", f"--work-tree={self._toplevel}",
+            "-c", "core.quotepath=off", "-c", "diff.noprefix=false", "-c", "diff.mnemonicPrefix=false",
+            *args,
+        ]
+    
+    def _unified_arg(self) -> str:
+        return f"--unified={self.context_lines}"
+    
+    def _exclude_pathspec(self) -> List[str]:
+        """Pathspec arguments that let git drop excluded files before producing diffs."""
+        specs = [":/"]
+        for pattern in self.exclude_patterns:
+            glob = pattern if "/" in pattern else f"**/{pattern}"
+            specs.append(f":(top,exclude,glob){glob}")
+        return ["--"] + specs
+    
+    def _run_diff(self, diff_cmd: List[str]) -> Dict[str, str]:
+        """
+        Run a single git diff command and split its output per file.
+        
+        Output is streamed from the pipe and split as it arrives, so the full
+        diff is never buffered as one string on top of the per-file copies.
+        stderr goes to a temporary file: a second pipe left unread while
+        stdout is drained would deadlock once git filled it with warnings.
+        
+        Args:
+            diff_cmd: Full git command producing a unified diff
+        
+        Returns:
+            Dictionary mapping file paths to their unified diff strings
+        
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+        """
+        with tempfile.TemporaryFile() as stderr_file:
+            with subprocess.Popen(
+                diff_cmd,
+                cwd=self.repo_path,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file
+            ) as process:
+                # Read raw bytes and decode as UTF-8 ourselves rather than through
+                # the locale-dependent text wrapper
+                diffs = self._parse_unified_diff_by_file(
+                    line.decode('utf-8', errors='replace') for line in process.stdout
+                )
+            if process.returncode:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+                raise subprocess.CalledProcessError(process.returncode, diff_cmd, stderr=stderr)
+        return diffs
+    
+    def _diff_to_dict(self, diff) -> Dict[str, str]:
+        """Convert a pygit2 Diff into a mapping of file paths to patch text."""
+        return {patch.delta.new_file.path: patch.text for patch in diff}
+    
+    def _peel_tree(self, ref: str):
+        """Resolve a git reference to its commit tree via pygit2."""
+        return self.repo.revparse_single(ref).peel(pygit2.Commit).tree
     
     def get_diff(self, base: str, target: str = "HEAD") -> Dict[str, str]:
         """
@@ -45,218 +233,174 @@ class DiffGeneratorAgent:
             Dictionary mapping file paths to their unified diff strings
         """
         try:
-            # Get list of changed files
-            files_cmd = ["git", "diff", "--name-only", f"{base}..{target}"]
-            result = subprocess.run(
-                files_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            changed_files = result.stdout.strip().split('\n')
-            changed_files = [f for f in changed_files if f]  # Remove empty lines
+            if self.repo is not None:
+                diffs = self._diff_to_dict(
+                    self.repo.diff(self._peel_tree(base), self._peel_tree(target),
+                                   context_lines=self.context_lines)
+                )
+            else:
+                diffs = self._run_diff(self._git("diff", self._unified_arg(), f"{base}..{target}", *self._exclude_pathspec()))
             
-            if not changed_files:
-                print(f"No changes found between {base} and {target}")
+            if not diffs:
+                print(f"No changes found between {base} and {target}", file=sys.stderr)
                 return {}
             
-            # Get diff for each file
-            diffs = {}
-            for file_path in changed_files:
-                diff_cmd = ["git", "diff", f"{base}..{target}", "--", file_path]
-                result = subprocess.run(
-                    diff_cmd,
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                diffs[file_path] = result.stdout
-            
             return diffs
             
         except subprocess.CalledProcessError as e:
-            print(f"Error getting diff: {e}")
-            print(f"stderr: {e.stderr}")
+            print(f"Error getting diff: {e}", file=sys.stderr)
+            print(f"stderr: {e.stderr}", file=sys.stderr)
+            return {}
+        except (KeyError, ValueError) as e:
+            print(f"Error getting diff: {e}", file=sys.stderr)
             return {}
     
     def get_staged_diff(self) -> Dict[str, str]:
         """Get diff for staged changes."""
         try:
-            # Get list of staged files
-            files_cmd = ["git", "diff", "--cached", "--name-only"]
-            result = subprocess.run(
-                files_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            if self.repo is not None:
+                diffs = self._diff_to_dict(self.repo.diff("HEAD", cached=True, context_lines=self.context_lines))
+            else:
+                diffs = self._run_diff(self._git("diff", self._unified_arg(), "--cached", *self._exclude_pathspec()))
             
-            staged_files = result.stdout.strip().split('\n')
-            staged_files = [f for f in staged_files if f]
-            
-            if not staged_files:
-                print("No staged changes found")
+            if not diffs:
+                print("No staged changes found", file=sys.stderr)
                 return {}
             
-            # Get diff for each staged file
-            diffs = {}
-            for file_path in staged_files:
-                diff_cmd = ["git", "diff", "--cached", "--", file_path]
-                result = subprocess.run(
-                    diff_cmd,
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                diffs[file_path] = result.stdout
-            
             return diffs
             
-        except subprocess.CalledProcessError as e:
-            print(f"Error getting staged diff: {e}")
+        except (subprocess.CalledProcessError, KeyError, ValueError) as e:
+            print(f"Error getting staged diff: {e}", file=sys.stderr)
             return {}
     
     def get_unstaged_diff(self) -> Dict[str, str]:
         """Get diff for unstaged changes."""
         try:
-            # Get list of unstaged files
-            files_cmd = ["git", "diff", "--name-only"]
-            result = subprocess.run(
-                files_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            unstaged_files = result.stdout.strip().split('\n')
-            unstaged_files = [f for f in unstaged_files if f]
+            if self.repo is not None:
+                diffs = self._diff_to_dict(self.repo.diff(context_lines=self.context_lines))
+            else:
+                diffs = self._run_diff(self._git("diff", self._unified_arg(), *self._exclude_pathspec()))
             
-            if not unstaged_files:
-                print("No unstaged changes found")
+            if not diffs:
+                print("No unstaged changes found", file=sys.stderr)
                 return {}
             
-            # Get diff for each unstaged file
-            diffs = {}
-            for file_path in unstaged_files:
-                diff_cmd = ["git", "diff", "--", file_path]
-                result = subprocess.run(
-                    diff_cmd,
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                diffs[file_path] = result.stdout
-            
             return diffs
             
-        except subprocess.CalledProcessError as e:
-            print(f"Error getting unstaged diff: {e}")
+        except (subprocess.CalledProcessError, KeyError, ValueError) as e:
+            print(f"Error getting unstaged diff: {e}", file=sys.stderr)
             return {}
     
     def get_commit_diff(self, commit_hash: str) -> Dict[str, str]:
         """Get diff for a specific commit."""
+        if self.repo is not None:
+            try:
+                commit = self.repo.revparse_single(commit_hash).peel(pygit2.Commit)
+                if commit.parents:
+                    diffs = self._diff_to_dict(self.repo.diff(
+                        commit.parents[0], commit, context_lines=self.context_lines
+                    ))
+                else:
+                    diffs = self._diff_to_dict(commit.tree.diff_to_tree(
+                        context_lines=self.context_lines, swap=True
+                    ))
+                if not diffs:
+                    print(f"No changes found in commit {commit_hash}", file=sys.stderr)
+                return diffs
+            except (KeyError, ValueError) as e:
+                print(f"Error getting commit diff: {e}", file=sys.stderr)
+                return {}
+        
         try:
-            # Get list of files changed in the commit
-            files_cmd = ["git", "show", "--name-only", "--pretty=format:", commit_hash]
-            result = subprocess.run(
-                files_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            # diff-tree emits only the patches (no commit message or metadata);
+            # --root also covers the initial commit
+            diffs = self._run_diff(self._git(
+                "diff-tree", "--no-commit-id", "-p", "-r", "--root",
+                self._unified_arg(), commit_hash, *self._exclude_pathspec()
+            ))
             
-            changed_files = result.stdout.strip().split('\n')
-            changed_files = [f for f in changed_files if f]
-            
-            if not changed_files:
-                print(f"No changes found in commit {commit_hash}")
+            if not diffs:
+                print(f"No changes found in commit {commit_hash}", file=sys.stderr)
                 return {}
             
-            # Get diff for the commit
-            diff_cmd = ["git", "show", commit_hash]
-            result = subprocess.run(
-                diff_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Parse the diff to separate files
-            diff_output = result.stdout
-            diffs = self._parse_commit_diff(diff_output)
-            
             return diffs
             
         except subprocess.CalledProcessError as e:
-            print(f"Error getting commit diff: {e}")
+            print(f"Error getting commit diff: {e}", file=sys.stderr)
             return {}
     
-    def _parse_commit_diff(self, diff_output: str) -> Dict[str, str]:
-        """Parse commit diff output to separate files."""
+    def _parse_unified_diff_by_file(self, lines: Iterable[str]) -> Dict[str, str]:
+        """Split unified diff lines (with line endings) on `diff --git` headers into per-file diffs."""
         diffs = {}
-        current_file = None
         current_diff = []
         
-        for line in diff_output.split('\n'):
-            if line.startswith('diff --git'):
+        for line in lines:
+            if line.startswith('diff --git '):
                 # Save previous file diff
-                if current_file and current_diff:
-                    diffs[current_file] = '\n'.join(current_diff)
-                
-                # Start new file
-                parts = line.split()
-                if len(parts) >= 3:
-                    current_file = parts[2].replace('b/', '')
-                    current_diff = [line]
-                else:
-                    current_file = None
-                    current_diff = []
-            elif current_file:
+                if current_diff:
+                    diffs[_patch_file_path(current_diff)] = ''.join(current_diff)
+                current_diff = [line]
+            elif current_diff:
                 current_diff.append(line)
         
         # Save last file diff
-        if current_file and current_diff:
-            diffs[current_file] = '\n'.join(current_diff)
+        if current_diff:
+            diffs[_patch_file_path(current_diff)] = ''.join(current_diff)
         
         return diffs
     
-    def generate_diff_json(self, output_file: str = "diff.json", **kwargs) -> bool:
+    def get_diffs_dict(self, **kwargs) -> Dict[str, str]:
         """
-        Generate diff.json file based on the provided parameters.
+        Collect diffs in memory based on the provided parameters.
+        
+        Excluded paths (see DEFAULT_EXCLUDE_PATTERNS) and binary diffs are
+        dropped so they never reach the reviewer.
         
         Args:
-            output_file: Output JSON file path
-            **kwargs: Diff parameters (base, target, mode, etc.)
+            **kwargs: Diff parameters (base, target, mode, commit_hash)
         
         Returns:
-            True if successful, False otherwise
-        """
-        diffs = {}
+            Dictionary mapping file paths to their unified diff strings
         
-        if kwargs.get('mode') == 'staged':
+        Raises:
+            ValueError: If commit mode is requested without a commit_hash
+        """
+        mode = kwargs.get('mode')
+        if mode == 'staged':
             diffs = self.get_staged_diff()
-        elif kwargs.get('mode') == 'unstaged':
+        elif mode == 'unstaged':
             diffs = self.get_unstaged_diff()
-        elif kwargs.get('mode') == 'commit':
+        elif mode == 'commit':
             commit_hash = kwargs.get('commit_hash')
             if not commit_hash:
-                print("Error: commit_hash required for commit mode")
-                return False
+                raise ValueError("commit_hash required for commit mode")
             diffs = self.get_commit_diff(commit_hash)
         else:
             # Default: branch comparison
-            base = kwargs.get('base', 'main')
-            target = kwargs.get('target', 'HEAD')
-            diffs = self.get_diff(base, target)
+            diffs = self.get_diff(kwargs.get('base') or 'main', kwargs.get('target') or 'HEAD')
+        
+        kept = {p: d for p, d in diffs.items() if not is_skipped_file(p, d, self.exclude_patterns)}
+        if len(kept) < len(diffs):
+            print(f"Skipped {len(diffs) - len(kept)} generated, vendored or binary files", file=sys.stderr)
+        return kept
+    
+    def generate_diff_json(self, output_file: str = "diff.json", compact: bool = False, **kwargs) -> bool:
+        """
+        Generate diff.json file based on the provided parameters.
+        
+        Args:
+            output_file: Output JSON file path
+            compact: Write compact JSON instead of indenting it
+            **kwargs: Diff parameters (base, target, mode, etc.)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            diffs = self.get_diffs_dict(**kwargs)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return False
         
         if not diffs:
             print("No changes found to generate diff.json")
@@ -267,8 +411,8 @@ class DiffGeneratorAgent:
         
         # Write to file
         try:
-            with open(output_file, 'w') as f:
-                json.dump(diff_data, f, indent=2)
+            with open(output_file, 'wb') as f:
+                f.write(dumps_json(diff_data, compact=compact))
             print(f"Generated {output_file} with {len(diffs)} files")
             return True
         except Exception as e:
@@ -326,11 +470,31 @@ Examples:
         '--commit-hash',
         help='Commit hash for commit mode'
     )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='Glob of files to skip, in addition to lockfiles and generated files (repeatable)'
+    )
+    parser.add_argument(
+        '--context',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Unchanged context lines around each change (default: 1)'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Write compact JSON instead of pretty-printing it'
+    )
     
     args = parser.parse_args()
     
     try:
-        agent = DiffGeneratorAgent(args.repo_path)
+        agent = DiffGeneratorAgent(args.repo_path, exclude_patterns=args.exclude,
+                                   context_lines=args.context)
         
         kwargs = {
             'mode': args.mode,
@@ -339,7 +503,7 @@ Examples:
             'commit_hash': args.commit_hash
         }
         
-        success = agent.generate_diff_json(args.output, **kwargs)
+        success = agent.generate_diff_json(args.output, compact=args.compact, **kwargs)
         if success:
             print(f"Successfully generated {args.output}")
             sys.exit(0)
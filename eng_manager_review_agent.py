@@ -1,52 +1,24 @@
 import os
-import json
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, SystemMessage
+import re
+import asyncio
+import hashlib
+from fnmatch import fnmatch
+from functools import lru_cache
+from string import Template
 from llm_providers.factory import LLMProviderFactory
-from diff_generator_agent import DiffGeneratorAgent
-from tools import run_flake8, run_bandit, run_snyk, run_mypy, run_pylint, run_eslint, run_npm_audit, run_golint, run_gosec, run_govulncheck, TOOLS
+from llm_providers.cache import DiskCache
+from llm_providers.base_provider import CACHE_BREAKPOINT
+from llm_providers.async_runtime import run_sync
+from diff_generator_agent import DiffGeneratorAgent, DEFAULT_EXCLUDE_PATTERNS
+from tools import run_all_async
 from repo_utils import detect_repo_types, get_tools_for_repo_types
+from json_utils import dumps_json, loads_json
 
-# Optional: import LLM SDKs
+# Optional: accurate token counts
 try:
-    import openai
+    import tiktoken
 except ImportError:
-    openai = None
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-try:
-    import ollama
-except ImportError:
-    ollama = None
-
-# Tool functions
-import subprocess
-
-def run_flake8(repo_path):
-    result = subprocess.run([
-        "flake8", repo_path
-    ], capture_output=True, text=True)
-    return result.stdout
-
-def run_bandit(repo_path):
-    result = subprocess.run([
-        "bandit", "-r", repo_path, "-f", "json"
-    ], capture_output=True, text=True)
-    return result.stdout
-
-def run_snyk(repo_path):
-    result = subprocess.run([
-        "snyk", "test", repo_path, "--json"
-    ], capture_output=True, text=True)
-    return result.stdout
-
-TOOLS = {
-    "flake8": run_flake8,
-    "bandit": run_bandit,
-    "snyk": run_snyk,
-}
+    tiktoken = None
 
 TEAM_GUIDING_PRINCIPLES = [
     "Code readability & overall architecture clarity",
@@ -164,6 +136,72 @@ ANTI_PATTERNS = [
     },
 ]
 
+# Prompt fragment rendered once at import; REVIEW_POINTS never changes at runtime
+_POINTS_STR = "".join(
+    f"\n{section}:\n" + "".join(f"- {p}\n" for p in points)
+    for section, points in REVIEW_POINTS
+)
+
+_PRINCIPLES_STR = "".join(f"- {p}\n" for p in TEAM_GUIDING_PRINCIPLES)
+
+_ANTI_PATTERNS_STR = "".join(
+    f"- {ap['name']}: {ap['description']} Remediation: {ap['remediation']}\n"
+    for ap in ANTI_PATTERNS
+)
+
+# Static instructions shared by every prompt. Providers cache by longest
+# common prefix, so this goes first and per-file content goes last.
+REVIEW_SYSTEM_PROMPT = (
+    "You are an expert engineering manager reviewing code changes.\n"
+    f"Review Points to check for:\n{_POINTS_STR}\n"
+    f"Anti-Patterns to call out:\n{_ANTI_PATTERNS_STR}"
+)
+
+# User prompt templates, parsed once. Repo-wide reports and instructions come
+# first so every call in a run shares the same prefix up to the per-file part,
+# which is where the prompt-cache breakpoint goes.
+_REPORTS_TEMPLATE = (
+    "Flake8 Linting Report (if any):\n$flake8_report\n"
+    "Bandit Security Report (if any):\n$bandit_report\n"
+    "Snyk Vulnerability Report (if any):\n$snyk_report\n"
+)
+_REVIEW_PROMPT = Template(
+    _REPORTS_TEMPLATE
+    + "Please provide detailed, actionable review comments for the diff below, referencing the "
+    "review points and reports. If you spot any anti-patterns, call them out and suggest concrete improvements."
+    + CACHE_BREAKPOINT
+    + "---\n"
+    "${preamble}File: $file_path\n"
+    "Diff:\n$diff\n"
+)
+_BATCH_REVIEW_PROMPT = Template(
+    _REPORTS_TEMPLATE
+    + "Please provide detailed, actionable review comments for each file's diff below, referencing the "
+    "review points and reports. If you spot any anti-patterns, call them out and suggest concrete improvements.\n"
+    'Return only JSON of the form: {"reviews": [{"file": "<path>", "comments": "<review>"}]}'
+    + CACHE_BREAKPOINT
+    + "---\n"
+    "Files to review:\n$file_blocks\n"
+)
+
+# Bump whenever prompt wording changes so cached reviews are invalidated
+PROMPT_VERSION = "5"
+DEFAULT_CACHE_DIR = ".review_cache"
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+async def _acache_read(cache_dir, key):
+    """Return the cached text for key, or None on a miss or when caching is disabled; the read runs in a worker thread."""
+    if not cache_dir:
+        return None
+    return await asyncio.to_thread(DiskCache(cache_dir).get, key)
+
+async def _acache_write(cache_dir, key, value):
+    """Atomically store value under key (in a worker thread) so concurrent reviewers never see partial files."""
+    if cache_dir:
+        await asyncio.to_thread(DiskCache(cache_dir).set, key, value)
+
 def get_llm_provider(provider: str, model: str = None, **kwargs):
     """
     Get LLM provider using factory pattern.
@@ -178,62 +216,401 @@ def get_llm_provider(provider: str, model: str = None, **kwargs):
     """
     return LLMProviderFactory.create_provider(provider, model, **kwargs)
 
+_CHANGE_TYPES = {"+": "+", "-": "-"}
+_DIFF_HEADER_PREFIXES = ("+++ ", "--- ", "@@")
+
 def parse_unified_diff(diff_str: str):
-    changes = []
+    """
+    Yield (change_type, content) tuples for each line of a unified diff.
+    
+    change_type is "+", "-" or " "; file and hunk headers are skipped.
+    Lazy so callers that only count or filter changes never build a list.
+    """
+    classify = _CHANGE_TYPES.get
     for line in diff_str.splitlines():
-        if line.startswith("+++ ") or line.startswith("--- "):
+        if line.startswith(_DIFF_HEADER_PREFIXES):
             continue
+        change_type = classify(line[:1])
+        if change_type:
+            yield change_type, line[1:]
+        else:
+            yield " ", line
+
+def _review_cache_key(llm_provider, file_path: str, diff_str: str) -> str:
+    return _cache_key(llm_provider.model, PROMPT_VERSION, file_path, diff_str)
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for batching decisions."""
+    return len(text) // 4
+
+def _strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```/```json markdown fence if the model added one."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+TRIVIAL_REVIEW = "(skipped: trivial or generated change)"
+
+def _significant_lines(lines):
+    """Lines without trailing whitespace, blank lines dropped."""
+    return [line.rstrip() for line in lines if line.strip()]
+
+def _is_trivial_diff(file_path: str, diff_str: str) -> bool:
+    """
+    Whether a diff is not worth an LLM review.
+    
+    True for lockfiles and other generated or vendored files, for changes
+    that only touch trailing whitespace or blank lines, and for pure import
+    reorderings. Other whitespace can matter (indentation, tabs in Makefiles,
+    spaces inside string literals), so it still gets a review.
+    """
+    name = os.path.basename(file_path)
+    if any(fnmatch(name, pattern) for pattern in DEFAULT_EXCLUDE_PATTERNS):
+        return True
+    if file_path.startswith("vendor/") or "/vendor/" in file_path:
+        return True
+    removed, added = [], []
+    for change_type, content in parse_unified_diff(diff_str):
+        if change_type == "-":
+            removed.append(content)
+        elif change_type == "+":
+            added.append(content)
+    if _significant_lines(removed) == _significant_lines(added):
+        return True
+    changed = removed + added
+    return all(line.lstrip().startswith(("import ", "from ")) for line in changed) and sorted(
+        line.rstrip() for line in removed
+    ) == sorted(line.rstrip() for line in added)
+
+# Runs of unchanged lines longer than this are collapsed before prompting
+MAX_UNCHANGED_RUN = 8
+
+def compress_diff(diff_str: str, max_run: int = MAX_UNCHANGED_RUN) -> str:
+    """Collapse long runs of unchanged context lines to save prompt tokens."""
+    out = []
+    run = []
+    
+    def flush():
+        if len(run) > max_run:
+            out.append(f" ... {len(run)} lines unchanged ...\n")
+        else:
+            out.extend(run)
+        run.clear()
+    
+    for line in diff_str.splitlines(keepends=True):
+        if line.startswith(" "):
+            run.append(line)
+        else:
+            flush()
+            out.append(line)
+    flush()
+    return "".join(out)
+
+def _hunk_signature(diff_str: str) -> tuple:
+    """
+    Content hash of every hunk in a file diff, ignoring line numbers and indentation.
+    
+    Files touched by the same mechanical change (renames, API migrations)
+    end up with identical signatures and only need to be reviewed once.
+    """
+    hashes = []
+    current = None
+    for line in diff_str.splitlines():
         if line.startswith("@@"):
-            continue
-        if line.startswith("+"):
-            changes.append({"type": "+", "content": line[1:]})
-        elif line.startswith("-"):
-            changes.append({"type": "-", "content": line[1:]})
+            if current is not None:
+                hashes.append(current.hexdigest())
+            current = hashlib.blake2b(digest_size=8)
+        elif current is not None:
+            current.update((line[:1] + line[1:].strip() + "\n").encode("utf-8"))
+    if current is not None:
+        hashes.append(current.hexdigest())
+    return tuple(sorted(hashes))
+
+def _group_duplicate_diffs(files: dict) -> dict:
+    """Map each representative file path to the other paths carrying the same hunks."""
+    groups = {}
+    representative_by_signature = {}
+    for file_path, diff_str in files.items():
+        signature = _hunk_signature(diff_str)
+        representative = representative_by_signature.get(signature) if signature else None
+        if representative is None:
+            if signature:
+                representative_by_signature[signature] = file_path
+            groups[file_path] = []
         else:
-            changes.append({"type": " ", "content": line})
-    return changes
+            groups[representative].append(file_path)
+    return groups
 
-# Node: Generate review comments for a file
-def review_file_node(state):
+# Diffs estimated above this are split into hunk-aligned chunks before review
+MAX_CHUNK_TOKENS = 6000
+
+@lru_cache(maxsize=8)
+def _token_encoding(model: str = None):
+    """Load the tiktoken encoding for model once; None when tiktoken or its data is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str, model: str = None) -> int:
+    encoding = _token_encoding(model)
+    if encoding is None:
+        return _estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@", re.MULTILINE)
+
+def _hunk_range(diff_str: str) -> str:
+    """Describe the new-file lines covered by the hunks in diff_str, e.g. "lines 10-42"."""
+    spans = [(int(start), int(count or 1)) for start, count in _HUNK_HEADER_RE.findall(diff_str)]
+    if not spans:
+        return "whole diff"
+    first = spans[0][0]
+    last = max(start + max(count, 1) - 1 for start, count in spans)
+    return f"lines {first}-{last}"
+
+def _chunk_diff(diff_str: str, max_tokens: int = MAX_CHUNK_TOKENS, model: str = None) -> list:
+    """
+    Split a file diff into chunks of whole hunks that each fit max_tokens.
+    
+    Every chunk repeats the file header (diff --git/index/---/+++ lines).
+    A single hunk larger than the budget becomes its own chunk.
+    """
+    if count_tokens(diff_str, model) <= max_tokens:
+        return [diff_str]
+    header = []
+    hunks = []
+    for line in diff_str.splitlines(keepends=True):
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    header_str = "".join(header)
+    header_tokens = count_tokens(header_str, model)
+    chunks = []
+    current = []
+    current_tokens = header_tokens
+    # Each hunk is tokenized once; chunk sizes are the sum of their hunks
+    for hunk in ("".join(h) for h in hunks):
+        hunk_tokens = count_tokens(hunk, model)
+        if current and current_tokens + hunk_tokens > max_tokens:
+            chunks.append(header_str + "".join(current))
+            current = []
+            current_tokens = header_tokens
+        current.append(hunk)
+        current_tokens += hunk_tokens
+    if current or not chunks:
+        chunks.append(header_str + "".join(current))
+    return chunks
+
+async def _review_diff(state, file_path: str, diff_str: str, preamble: str = "", cache_id: str = None) -> str:
+    """Review one diff (or diff chunk) with the LLM, going through the review cache."""
+    llm_provider = state["llm_provider"]
+    cache_dir = state.get("cache_dir")
+    key = _review_cache_key(llm_provider, cache_id or file_path, diff_str)
+    cached = await _acache_read(cache_dir, key)
+    if cached is not None:
+        return cached
+    prompt = _REVIEW_PROMPT.substitute(
+        flake8_report=state.get("flake8_report", ""),
+        bandit_report=state.get("bandit_report", ""),
+        snyk_report=state.get("snyk_report", ""),
+        preamble=preamble,
+        file_path=file_path,
+        diff=compress_diff(diff_str),
+    )
+    response = "".join([chunk async for chunk in llm_provider.ainvoke_stream(prompt, REVIEW_SYSTEM_PROMPT)])
+    await _acache_write(cache_dir, key, response)
+    return response
+
+async def review_file_async(state) -> str:
+    """Review ``state["diff_str"]`` for ``state["file_path"]``, chunking oversized diffs."""
     llm_provider = state["llm_provider"]
     file_path = state["file_path"]
     diff_str = state["diff_str"]
-    flake8_report = state.get("flake8_report", "")
-    bandit_report = state.get("bandit_report", "")
-    snyk_report = state.get("snyk_report", "")
-    points_str = ""
-    for section, points in REVIEW_POINTS:
-        points_str += f"\n{section}:\n"
-        for p in points:
-            points_str += f"- {p}\n"
-    prompt = (
-        f"File: {file_path}\n"
-        f"Diff:\n{diff_str}\n"
-        f"Flake8 Linting Report (if any):\n{flake8_report}\n"
-        f"Bandit Security Report (if any):\n{bandit_report}\n"
-        f"Snyk Vulnerability Report (if any):\n{snyk_report}\n"
-        f"Review Points and Anti-Patterns to check for:\n{points_str}\n"
-        "Please provide detailed, actionable review comments for this diff, referencing the above. "
-        "If you spot any anti-patterns, call them out and suggest concrete improvements."
+    if _is_trivial_diff(file_path, diff_str):
+        return TRIVIAL_REVIEW
+    cache_dir = state.get("cache_dir")
+    key = _review_cache_key(llm_provider, file_path, diff_str)
+    cached = await _acache_read(cache_dir, key)
+    if cached is not None:
+        return cached
+    chunks = _chunk_diff(diff_str, model=llm_provider.model)
+    if len(chunks) == 1:
+        return await _review_diff(state, file_path, diff_str)
+    # Oversized diff: review the chunks concurrently, then store the joined review for the whole file
+    total = len(chunks)
+    reviews = await asyncio.gather(*(
+        _review_diff(
+            state, file_path, chunk,
+            f"This is chunk {i}/{total} ({_hunk_range(chunk)}) of the diff for {file_path}; review only this part.\n",
+            cache_id=f"{file_path}#{i}/{total}",
+        )
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    review = "\n\n".join(
+        f"Chunk {i}/{total} ({_hunk_range(chunk)}):\n{chunk_review}"
+        for i, (chunk, chunk_review) in enumerate(zip(chunks, reviews), 1)
     )
-    system_prompt = "You are an expert engineering manager reviewing code changes."
-    response = llm_provider.invoke_simple(prompt, system_prompt)
-    state["review"] = response
+    await _acache_write(cache_dir, key, review)
+    return review
+
+# Node: Generate review comments for a file
+def review_file_node(state):
+    state["review"] = run_sync(review_file_async(state))
     return state
 
-# Node: Generate PR summary
-def pr_summary_node(state):
+async def review_files_concurrently(state, max_concurrency: int = 8):
+    """
+    Review every file in ``state["files"]`` concurrently.
+    
+    Each review is an independent, network-bound LLM call, so all of them
+    are awaited together with asyncio.gather instead of one after another.
+    
+    Args:
+        state: Pipeline state holding the provider, files and tool reports
+        max_concurrency: Upper bound on in-flight LLM calls
+        
+    Returns:
+        List of {"file", "review"} dicts in the same order as ``state["files"]``
+    """
+    files = state.get("files") or {}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def review(file_path, diff_str):
+        async with semaphore:
+            result = await review_file_async({**state, "file_path": file_path, "diff_str": diff_str})
+        return {"file": file_path, "review": result}
+    
+    return list(await asyncio.gather(*(review(fp, ds) for fp, ds in files.items())))
+
+async def review_batch_async(state) -> dict:
+    """Review all files in a single LLM call; returns {file_path: review} for the files the model answered."""
     llm_provider = state["llm_provider"]
     files = state["files"]
+    file_blocks = "".join(
+        f"---FILE: {file_path}---\n{compress_diff(diff_str)}\n---END---\n"
+        for file_path, diff_str in files.items()
+    )
+    prompt = _BATCH_REVIEW_PROMPT.substitute(
+        flake8_report=state.get("flake8_report", ""),
+        bandit_report=state.get("bandit_report", ""),
+        snyk_report=state.get("snyk_report", ""),
+        file_blocks=file_blocks,
+    )
+    response = await llm_provider.ainvoke_simple(prompt, REVIEW_SYSTEM_PROMPT)
+    batch_reviews = {}
+    try:
+        parsed = loads_json(_strip_code_fences(response))
+        for entry in parsed.get("reviews", []):
+            comments = entry.get("comments", "")
+            if isinstance(comments, list):
+                comments = "\n".join(f"- {c}" for c in comments)
+            batch_reviews[entry.get("file")] = str(comments)
+    except (ValueError, AttributeError, TypeError):
+        # Unparseable output: leave batch_reviews empty so callers fall back to per-file reviews
+        pass
+    return batch_reviews
+
+# Node: Generate review comments for all files in a single LLM call
+def review_batch_node(state):
+    state["batch_reviews"] = run_sync(review_batch_async(state))
+    return state
+
+# Files whose combined diffs stay under this estimate are reviewed in one call
+BATCH_REVIEW_MAX_TOKENS = 12000
+
+async def reviews_async(state) -> list:
+    """
+    Review all files, preferring one batched LLM call for small PRs.
+    
+    Trivial changes (lockfiles, generated files, whitespace, import order)
+    are not sent to the LLM at all. Files whose hunks are identical to another file's are reviewed once and
+    share the result. Cached reviews are reused next. Remaining files are
+    sent in a single combined prompt when their diffs fit
+    BATCH_REVIEW_MAX_TOKENS; anything too large, or missing from the batched
+    answer, is reviewed per file concurrently.
+    
+    Returns:
+        List of {"file", "review"} dicts in the same order as ``state["files"]``
+    """
+    llm_provider = state["llm_provider"]
+    files = state.get("files") or {}
+    cache_dir = state.get("cache_dir")
+    reviews = {fp: TRIVIAL_REVIEW for fp, ds in files.items() if _is_trivial_diff(fp, ds)}
+    groups = _group_duplicate_diffs({fp: ds for fp, ds in files.items() if fp not in reviews})
+    pending = {}
+    cached_reviews = await asyncio.gather(*(
+        _acache_read(cache_dir, _review_cache_key(llm_provider, fp, files[fp])) for fp in groups
+    ))
+    for file_path, cached in zip(groups, cached_reviews):
+        if cached is not None:
+            reviews[file_path] = cached
+        else:
+            pending[file_path] = files[file_path]
+    
+    if len(pending) > 1 and count_tokens("".join(pending.values()), llm_provider.model) <= BATCH_REVIEW_MAX_TOKENS:
+        batch_reviews = await review_batch_async({**state, "files": pending})
+        for file_path, diff_str in pending.items():
+            if file_path in batch_reviews:
+                reviews[file_path] = batch_reviews[file_path]
+                await _acache_write(cache_dir, _review_cache_key(llm_provider, file_path, diff_str), reviews[file_path])
+        pending = {fp: ds for fp, ds in pending.items() if fp not in reviews}
+    
+    for result in await review_files_concurrently({**state, "files": pending}):
+        reviews[result["file"]] = result["review"]
+    
+    # Files with the same hunks as an already reviewed file share its review
+    for representative, duplicates in groups.items():
+        if not duplicates:
+            continue
+        shared_review = reviews[representative]
+        group = [representative] + duplicates
+        for file_path in group:
+            others = ", ".join(fp for fp in group if fp != file_path)
+            reviews[file_path] = f"Also applies to: {others}\n\n{shared_review}"
+    
+    return [{"file": fp, "review": reviews[fp]} for fp in files]
+
+# Node: Review all files
+def reviews_node(state):
+    state["all_reviews"] = run_sync(reviews_async(state))
+    return state
+
+async def pr_summary_async(state) -> str:
+    """Write the PR summary; only needs the diffs, so it can run alongside the file reviews."""
+    llm_provider = state["llm_provider"]
+    files = state["files"]
+    cache_dir = state.get("cache_dir")
+    diff_hashes = [_cache_key(fp, ds) for fp, ds in files.items()]
+    key = _cache_key(llm_provider.model, PROMPT_VERSION, *sorted(files), *sorted(diff_hashes))
+    cached = await _acache_read(cache_dir, key)
+    if cached is not None:
+        return cached
     prompt = (
+        f"Guiding Principles:\n{_PRINCIPLES_STR}"
+        "Write a strategic PR summary (What/Why, Risks, Actions) for these changes.\n"
         f"Files changed: {list(files.keys())}\n"
-        f"Guiding Principles: {TEAM_GUIDING_PRINCIPLES}\n"
-        "Write a strategic PR summary (What/Why, Risks, Actions) for these changes."
     )
     
-    system_prompt = "You are an expert engineering manager reviewing code changes."
-    response = llm_provider.invoke_simple(prompt, system_prompt)
-    state["pr_description"] = response
+    response = await llm_provider.ainvoke_simple(prompt, REVIEW_SYSTEM_PROMPT)
+    await _acache_write(cache_dir, key, response)
+    return response
+
+# Node: Generate PR summary
+def pr_summary_node(state):
+    state["pr_description"] = run_sync(pr_summary_async(state))
     return state
 
 # Node: Aggregate results
@@ -244,105 +621,150 @@ def aggregate_node(state):
         "pr_description": state["pr_description"]
     }
 
+# Tools whose reports are rendered into the review prompts; running others would only delay the reviews
+PROMPT_TOOLS = ("flake8", "bandit", "snyk")
+
+async def tool_agent_async(state) -> dict:
+    """
+    Run the linters and scanners that apply to the repository and feed the prompts.
+    
+    The tools are independent processes, so they are started as asyncio
+    subprocesses and awaited together; this takes as long as the slowest
+    tool rather than the sum of all, without a thread per tool.
+    Only PROMPT_TOOLS are run.
+    
+    Returns:
+        Mapping of tool name to its report
+    """
+    repo_path = state.get("repo_path", ".")
+    # Detection walks the tree, so it runs off the event loop like the tools themselves
+    repo_types = await asyncio.to_thread(detect_repo_types, repo_path)
+    tools = [tool for tool in get_tools_for_repo_types(repo_types) if tool in PROMPT_TOOLS]
+    return await run_all_async(repo_path, tools)
+
+def _store_tool_reports(state, reports):
+    state["tool_reports"] = reports
+    for tool in PROMPT_TOOLS:
+        state[f"{tool}_report"] = reports.get(tool, "")
+    return state
+
+# Node: Run static analysis tools
+def tool_agent_node(state):
+    return _store_tool_reports(state, run_sync(tool_agent_async(state)))
+
+def _generate_diffs(state) -> dict:
+    agent = DiffGeneratorAgent(state.get("repo_path", "."), context_lines=state.get("context_lines", 3))
+    return agent.get_diffs_dict(
+        mode=state.get("mode", "branch"),
+        base=state.get("base", "main"),
+        target=state.get("target", "HEAD"),
+        commit_hash=state.get("commit_hash"),
+    )
+
+async def diff_generator_async(state) -> dict:
+    """Generate the diffs off the event loop; git work is blocking."""
+    return await asyncio.to_thread(_generate_diffs, state)
+
 # Node: Diff Generator
 def diff_generator_node(state):
-    repo_path = state.get("repo_path", ".")
-    mode = state.get("mode", "branch")
-    base = state.get("base", "main")
-    target = state.get("target", "HEAD")
-    commit_hash = state.get("commit_hash")
-    agent = DiffGeneratorAgent(repo_path)
-    if mode == "staged":
-        diffs = agent.get_staged_diff()
-    elif mode == "unstaged":
-        diffs = agent.get_unstaged_diff()
-    elif mode == "commit":
-        if not commit_hash:
-            raise ValueError("commit_hash required for commit mode")
-        diffs = agent.get_commit_diff(commit_hash)
-    else:
-        diffs = agent.get_diff(base, target)
-    state["files"] = diffs
+    state["files"] = _generate_diffs(state)
     return state
 
-def main(input_json_file=None, provider=None, model=None, **kwargs):
-    # If input_json_file is provided, use it (legacy mode), else use diff_generator_node
-    files = {}
-    if input_json_file:
-        with open(input_json_file, "r") as f:
-            payload = json.load(f)
-        files = payload.get("files", {})
-    llm_provider = get_llm_provider(provider, model, **kwargs)
-    graph = StateGraph()
-    # Add diff generator node
-    graph.add_node("diff_generator", diff_generator_node)
-    graph.add_node("tool_agent", tool_agent_node)
-    # For each file, add a review node (these will be added after diff generation)
-    def make_review_node(fp, ds):
-        return lambda state: review_file_node({**state, "file_path": fp, "diff_str": ds})
-    # We'll add review nodes dynamically after diff generation
-    graph.add_node("pr_summary", pr_summary_node)
-    graph.add_node("aggregate", aggregate_node)
-    # Set entry to diff_generator
-    graph.set_entry("diff_generator")
-    # After diff_generator, dynamically add review nodes or go to aggregate if no files
-    graph.add_edge("diff_generator", "tool_agent")
-    def after_tool_agent(state):
-        files = state.get("files", {})
-        file_paths = list(files.keys())
-        if not file_paths:
-            return "aggregate"
-        # Add review nodes for each file
-        for file_path in file_paths:
-            graph.add_node(f"review_{file_path}", make_review_node(file_path, files[file_path]))
-        # Add edges between review nodes
-        for i, file_path in enumerate(file_paths):
-            if i < len(file_paths) - 1:
-                graph.add_edge(f"review_{file_path}", f"review_{file_paths[i+1]}")
-            else:
-                graph.add_edge(f"review_{file_path}", "pr_summary")
-        graph.add_edge("pr_summary", "aggregate")
-        graph.set_exit("aggregate")
-        return f"review_{file_paths[0]}"
-    graph.add_edge("tool_agent", after_tool_agent)
-    # Initial state
+async def arun_review_pipeline(files, provider, model=None, repo_path=".", mode="branch", base="main",
+                               target="HEAD", commit_hash=None, cache_dir=DEFAULT_CACHE_DIR, context_lines=1,
+                               **kwargs):
+    """
+    Run the review pipeline on the current event loop and return the aggregated result.
+    
+    Blocking work (git, linters, repo detection, cache I/O and provider
+    initialization) runs in worker threads or subprocesses, so this is safe
+    to await from an ASGI app or any other running event loop.
+    
+    Args:
+        files: Mapping of file paths to unified diffs, or None to generate
+            them from the repository using mode/base/target/commit_hash
+        provider: LLM provider name
+        model: Model name (optional, uses provider default)
+        repo_path: Repository the tools (and diff generation) run against
+        cache_dir: Review cache directory, falsy to disable
+        context_lines: Unchanged context lines when generating diffs
+        **kwargs: Additional provider-specific configuration
+        
+    Returns:
+        Dictionary with "comments" and "pr_description"
+    """
+    # The provider instance is shared with other pipelines, so per-run settings such as
+    # cache_dir live in state; the review cache covers every prompt sent below.
+    # The first lookup imports the provider module, so it runs in a worker thread.
+    llm_provider = await asyncio.to_thread(get_llm_provider, provider, model, **kwargs)
     state = {
         "llm_provider": llm_provider,
-        "repo_path": kwargs.get("repo_path", "."),
-        "mode": kwargs.get("mode", "branch"),
-        "base": kwargs.get("base", "main"),
-        "target": kwargs.get("target", "HEAD"),
-        "commit_hash": kwargs.get("commit_hash"),
+        "files": files,
+        "repo_path": repo_path,
+        "mode": mode,
+        "base": base,
+        "target": target,
+        "commit_hash": commit_hash,
+        "context_lines": context_lines,
+        "cache_dir": cache_dir,
         "all_reviews": []
     }
-    def on_node(node_name, state):
-        if node_name == "diff_generator":
-            return diff_generator_node(state)
-        if node_name == "tool_agent":
-            return tool_agent_node(state)
-        if node_name.startswith("review_"):
-            result = review_file_node(state)
-            state.setdefault("all_reviews", []).append({
-                "file": state["file_path"],
-                "review": result["review"]
-            })
-            return state
-        elif node_name == "pr_summary":
-            return pr_summary_node(state)
-        elif node_name == "aggregate":
-            return aggregate_node(state)
-        return state
-    result = graph.run(state, on_node=on_node)
-    print(json.dumps(result, indent=2))
+    # Diff generation (skipped when diffs were handed in) and the linters are independent
+    if files is None:
+        state["files"], reports = await asyncio.gather(diff_generator_async(state), tool_agent_async(state))
+    else:
+        reports = await tool_agent_async(state)
+    _store_tool_reports(state, reports)
+    state["all_reviews"], state["pr_description"] = await asyncio.gather(
+        reviews_async(state), pr_summary_async(state)
+    )
+    return aggregate_node(state)
+
+def run_review_pipeline(files, provider, model=None, **kwargs):
+    """Synchronous entry point for arun_review_pipeline (run on the shared provider event loop); see it for the arguments."""
+    return run_sync(arun_review_pipeline(files, provider, model, **kwargs))
+
+def main_from_dict(files, provider, model=None, compact=False, **kwargs):
+    """
+    Run the review pipeline and print the aggregated result as JSON.
+    
+    Args:
+        files: Mapping of file paths to unified diffs, or None to generate them
+        provider: LLM provider name
+        model: Model name (optional, uses provider default)
+        compact: Print compact JSON for machine consumers instead of indenting it
+        **kwargs: Pipeline options and provider configuration, see run_review_pipeline
+        
+    Returns:
+        Dictionary with "comments" and "pr_description"
+    """
+    result = run_review_pipeline(files, provider, model, **kwargs)
+    print(dumps_json(result, compact=compact).decode("utf-8"))
+    return result
+
+def main(input_json_file=None, provider=None, model=None, **kwargs):
+    # If input_json_file is provided, use it (legacy mode), else use diff_generator_node
+    files = None
+    if input_json_file:
+        with open(input_json_file, "rb") as f:
+            payload = loads_json(f.read())
+        files = payload.get("files", {})
+    return main_from_dict(files, provider, model, **kwargs)
 
 if __name__ == "__main__":
     import sys
     # Accept both legacy (input_json_file) and new (repo_path, mode, etc.) usage
-    if len(sys.argv) >= 3:
-        input_file = sys.argv[1]
-        provider = sys.argv[2]
-        model = sys.argv[3] if len(sys.argv) > 3 else None
-        main(input_file, provider, model)
+    if len(sys.argv) >= 3 and not sys.argv[1].startswith("-"):
+        import argparse
+        parser = argparse.ArgumentParser()
+        parser.add_argument('input_file', help='Path to diff.json')
+        parser.add_argument('provider', help='LLM provider (openai, gemini, claude, local)')
+        parser.add_argument('model', nargs='?', help='Model name (optional)')
+        parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Review cache directory, empty to disable (default: {DEFAULT_CACHE_DIR})')
+        parser.add_argument('--no-cache', action='store_true', help='Disable the review cache')
+        parser.add_argument('--compact', action='store_true', help='Print compact JSON instead of pretty-printing it')
+        args = parser.parse_args()
+        main(args.input_file, args.provider, args.model, cache_dir="" if args.no_cache else args.cache_dir, compact=args.compact)
     else:
         # New usage: all config via kwargs or environment
         # Example: python eng_manager_review_agent.py --repo-path . --mode branch --base main --target HEAD --provider openai --model gpt-4
@@ -355,8 +777,15 @@ if __name__ == "__main__":
         parser.add_argument('--commit-hash', help='Commit hash for commit mode')
         parser.add_argument('--provider', required=True, help='LLM provider (openai, gemini, claude, local)')
         parser.add_argument('--model', help='Model name (optional)')
+        parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Review cache directory, empty to disable (default: {DEFAULT_CACHE_DIR})')
+        parser.add_argument('--no-cache', action='store_true', help='Disable the review cache')
+        parser.add_argument('--context', type=int, default=1, help='Unchanged context lines around each change (default: 1)')
+        parser.add_argument('--compact', action='store_true', help='Print compact JSON instead of pretty-printing it')
         args = parser.parse_args()
         main(None, args.provider, args.model,
+             cache_dir="" if args.no_cache else args.cache_dir,
+             compact=args.compact,
+             context_lines=args.context,
              repo_path=args.repo_path,
              mode=args.mode,
              base=args.base,
@@ -0,0 +1,49 @@
+"""
+JSON helpers - use orjson when it is installed, falling back to the stdlib json module
+"""
+
+import json
+
+# Optional: fast JSON serialization
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_json(data, compact: bool = False) -> bytes:
+    """
+    Serialize data to UTF-8 encoded JSON.
+    
+    Args:
+        data: JSON-serializable object
+        compact: Emit without whitespace instead of indenting by 2 spaces
+    
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(data):
+    """
+    Parse a JSON document.
+    
+    Args:
+        data: JSON text as bytes, str or a memoryview
+    
+    Returns:
+        Decoded object
+    
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
@@ -3,16 +3,31 @@ LLM Providers Package
 Contains implementations for different LLM providers following SOLID principles
 """
 
+import importlib
+
 from .base_provider import BaseLLMProvider
-from .openai_provider import OpenAIProvider
-from .gemini_provider import GeminiProvider
-from .claude_provider import ClaudeProvider
-from .local_provider import LocalProvider
+from .cache import DiskCache
+
+# Provider classes are imported on first access (PEP 562) so that importing
+# the package does not pull in every vendor SDK
+_LAZY_PROVIDERS = {
+    'OpenAIProvider': '.openai_provider',
+    'GeminiProvider': '.gemini_provider',
+    'ClaudeProvider': '.claude_provider',
+    'LocalProvider': '.local_provider',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_PROVIDERS:
+        return getattr(importlib.import_module(_LAZY_PROVIDERS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'BaseLLMProvider',
     'OpenAIProvider', 
     'GeminiProvider',
     'ClaudeProvider',
-    'LocalProvider'
+    'LocalProvider',
+    'DiskCache'
 ] 
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Process-wide event loop shared by all synchronous entry points
+"""
+
+import atexit
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop on first use."""
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+
+    Every synchronous entry point goes through this one long-lived loop, so
+    async HTTP clients (and their pooled connections) created on it stay
+    usable across calls instead of dying with a per-call asyncio.run loop.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_sync() cannot be called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_loop.stop)
@@ -2,9 +2,21 @@
 Base LLM Provider - Abstract base class following Strategy pattern
 """
 
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from concurrent.futures import Future
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
+from .cache import DiskCache
+
+# Placed in a prompt after its static prefix; providers with explicit prompt
+# caching (Claude) end the cached block there, the others just drop it.
+CACHE_BREAKPOINT = "\n<<cache-breakpoint>>\n"
+
+
+class _Abandoned(Exception):
+    """The caller answering a shared prompt was cancelled before it had an answer."""
 
 
 class BaseLLMProvider(ABC):
@@ -24,6 +36,11 @@ class BaseLLMProvider(ABC):
         self.model = model
         self.config = kwargs
         self._llm = None
+        # Concurrent first calls (now made from worker threads) build the LLM once
+        self._llm_lock = threading.Lock()
+        # Prompts currently being answered, so identical concurrent calls share one request
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
     
     @abstractmethod
     def _initialize_llm(self) -> Any:
@@ -56,9 +73,11 @@ class BaseLLMProvider(ABC):
             LLM instance
         """
         if self._llm is None:
-            if not self._validate_config():
-                raise ValueError(f"Invalid configuration for {self.__class__.__name__}")
-            self._llm = self._initialize_llm()
+            with self._llm_lock:
+                if self._llm is None:
+                    if not self._validate_config():
+                        raise ValueError(f"Invalid configuration for {self.__class__.__name__}")
+                    self._llm = self._initialize_llm()
         return self._llm
     
     def invoke(self, messages: List[Any]) -> str:
@@ -73,7 +92,21 @@ class BaseLLMProvider(ABC):
         """
         llm = self.get_llm()
         response = llm.invoke(messages)
-        return response.content
+        return self._response_text(response)
+    
+    async def ainvoke(self, messages: List[Any]) -> str:
+        """
+        Asynchronously invoke the LLM with messages.
+        
+        Args:
+            messages: List of messages (SystemMessage, HumanMessage, etc.)
+            
+        Returns:
+            LLM response as string
+        """
+        llm = await self._aget_llm()
+        response = await llm.ainvoke(messages)
+        return self._response_text(response)
     
     def invoke_simple(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
@@ -86,11 +119,161 @@ class BaseLLMProvider(ABC):
         Returns:
             LLM response as string
         """
+        key = DiskCache.make_key(self.model, prompt, system_prompt)
+        shared, owner = self._claim_inflight_or_wait(key)
+        if not owner:
+            return shared.result()
+        try:
+            response = self.invoke(self._build_messages(prompt, system_prompt))
+        except BaseException as e:
+            self._settle_inflight(key, shared, error=e)
+            raise
+        self._settle_inflight(key, shared, response)
+        return response
+    
+    async def ainvoke_simple(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """
+        Async counterpart of invoke_simple, for reviewing many files concurrently.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            
+        Returns:
+            LLM response as string
+        """
+        key = DiskCache.make_key(self.model, prompt, system_prompt)
+        shared, owner = await self._aclaim_inflight_or_wait(key)
+        if not owner:
+            return shared.result()
+        try:
+            response = await self.ainvoke(self._build_messages(prompt, system_prompt))
+        except BaseException as e:
+            self._settle_inflight(key, shared, error=e)
+            raise
+        self._settle_inflight(key, shared, response)
+        return response
+    
+    async def _aget_llm(self):
+        """get_llm for async callers; the first call imports and builds the client in a worker thread."""
+        if self._llm is not None:
+            return self._llm
+        return await asyncio.to_thread(self.get_llm)
+    
+    def _claim_inflight(self, key: str) -> Tuple[Future, bool]:
+        """Return the shared future for key and whether this caller owns (must resolve) it."""
+        with self._inflight_lock:
+            shared = self._inflight.get(key)
+            if shared is not None:
+                return shared, False
+            shared = self._inflight[key] = Future()
+            return shared, True
+    
+    def _claim_inflight_or_wait(self, key: str) -> Tuple[Future, bool]:
+        """Claim key, or block until its owner finishes; retried if the owner gave up."""
+        while True:
+            shared, owner = self._claim_inflight(key)
+            if owner or not isinstance(shared.exception(), _Abandoned):
+                return shared, owner
+    
+    async def _aclaim_inflight_or_wait(self, key: str) -> Tuple[Future, bool]:
+        """Async counterpart of _claim_inflight_or_wait."""
+        while True:
+            shared, owner = self._claim_inflight(key)
+            if owner:
+                return shared, True
+            try:
+                # Shielded so a cancelled waiter does not cancel the owner's request
+                await asyncio.shield(asyncio.wrap_future(shared))
+            except _Abandoned:
+                continue
+            except Exception:
+                pass  # Re-raised by the caller's shared.result()
+            return shared, False
+    
+    def _settle_inflight(self, key: str, shared: Future, response: Optional[str] = None,
+                         error: Optional[BaseException] = None) -> None:
+        """Release key, then hand the owner's response or error to the callers waiting on it."""
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            shared.set_result(response)
+        elif isinstance(error, Exception):
+            shared.set_exception(error)
+        else:
+            # Cancelled or closed early is not an answer: a waiter retries and becomes the owner
+            shared.set_exception(_Abandoned())
+    
+    def invoke_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream the response to a prompt as it is generated.
+        
+        A call made while the same prompt is already being answered waits
+        for that answer and yields it as a single chunk.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            
+        Yields:
+            Response text chunks (the whole response at once for a shared answer)
+        """
+        key = DiskCache.make_key(self.model, prompt, system_prompt)
+        shared, owner = self._claim_inflight_or_wait(key)
+        if not owner:
+            yield shared.result()
+            return
+        try:
+            chunks = []
+            for chunk in self.get_llm().stream(self._build_messages(prompt, system_prompt)):
+                text = self._response_text(chunk)
+                chunks.append(text)
+                yield text
+        except BaseException as e:
+            self._settle_inflight(key, shared, error=e)
+            raise
+        self._settle_inflight(key, shared, "".join(chunks))
+    
+    async def ainvoke_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of invoke_stream.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            
+        Yields:
+            Response text chunks (the whole response at once for a shared answer)
+        """
+        key = DiskCache.make_key(self.model, prompt, system_prompt)
+        shared, owner = await self._aclaim_inflight_or_wait(key)
+        if not owner:
+            yield shared.result()
+            return
+        try:
+            chunks = []
+            llm = await self._aget_llm()
+            async for chunk in llm.astream(self._build_messages(prompt, system_prompt)):
+                text = self._response_text(chunk)
+                chunks.append(text)
+                yield text
+        except BaseException as e:
+            self._settle_inflight(key, shared, error=e)
+            raise
+        self._settle_inflight(key, shared, "".join(chunks))
+    
+    @staticmethod
+    def _build_messages(prompt: str, system_prompt: Optional[str] = None) -> List[Any]:
         messages = []
         if system_prompt:
             messages.append(SystemMessage(content=system_prompt))
-        messages.append(HumanMessage(content=prompt))
-        return self.invoke(messages)
+        messages.append(HumanMessage(content=prompt.replace(CACHE_BREAKPOINT, "\n")))
+        return messages
+    
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Chat models return a message object; plain LLMs (e.g. Ollama) return a string."""
+        return getattr(response, "content", response)
     
     @classmethod
     @abstractmethod
@@ -0,0 +1,64 @@
+"""
+Disk-backed LLM response cache
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+from typing import Optional
+
+
+class DiskCache:
+    """
+    Content-addressed cache of LLM responses.
+    Each response is stored in its own file named after its key (e.g. the
+    SHA256 from make_key), and replaced atomically, so concurrent writers never clash.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory holding the cached responses (created on first write)
+        """
+        self.directory = directory
+
+    @staticmethod
+    def make_key(model: str, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Build the cache key for one prompt sent to one model."""
+        return hashlib.sha256(f"{model}|{system_prompt or ''}|{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        try:
+            with open(os.path.join(self.directory, f"{key}.txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response, replacing the file atomically.
+
+        Args:
+            key: Cache key from make_key
+            value: LLM response to store
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, os.path.join(self.directory, f"{key}.txt"))
+        except OSError as e:
+            print(f"Warning: could not write LLM cache entry: {e}", file=sys.stderr)
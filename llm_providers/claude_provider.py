@@ -3,9 +3,16 @@ Anthropic Claude Provider Implementation
 """
 
 import os
-from typing import List
-from langchain_anthropic import ChatAnthropic
-from .base_provider import BaseLLMProvider
+from typing import Any, List, Optional
+from langchain_core.messages import HumanMessage, SystemMessage
+from .base_provider import BaseLLMProvider, CACHE_BREAKPOINT
+
+
+def _message_text(message: Any) -> Any:
+    """Copy of message with its content blocks joined back into one string."""
+    if isinstance(message.content, str):
+        return message
+    return message.copy(update={"content": "".join(block["text"] for block in message.content)})
 
 
 class ClaudeProvider(BaseLLMProvider):
@@ -22,13 +29,53 @@ class ClaudeProvider(BaseLLMProvider):
     
     def _initialize_llm(self):
         """Initialize Claude ChatAnthropic instance."""
+        from langchain_anthropic import ChatAnthropic
+        
+        class CachingChatAnthropic(ChatAnthropic):
+            """
+            The pinned langchain-anthropic only accepts string content, so the
+            messages are formatted as text and the content blocks (with their
+            cache_control) are put back before the request is sent.
+            """
+            
+            def _format_params(self, *, messages, stop=None, **kwargs):
+                params = super()._format_params(messages=[_message_text(m) for m in messages], stop=stop, **kwargs)
+                turns = [m for m in messages if m.type != "system"]
+                params["messages"] = [
+                    {"role": formatted["role"], "content": message.content}
+                    for formatted, message in zip(params["messages"], turns)
+                ]
+                return params
+        
         api_key = os.getenv("ANTHROPIC_API_KEY")
-        return ChatAnthropic(
+        return CachingChatAnthropic(
             model=self.model,
             anthropic_api_key=api_key,
             **self.config
         )
     
+    @staticmethod
+    def _build_messages(prompt: str, system_prompt: Optional[str] = None) -> List[Any]:
+        """
+        End the cached prefix at the prompt's CACHE_BREAKPOINT.
+        
+        The system prompt alone is below Claude's minimum cacheable size, so
+        the breakpoint goes after the static instructions and tool reports in
+        the user message; everything before it is cached.
+        """
+        messages = []
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+        if CACHE_BREAKPOINT not in prompt:
+            messages.append(HumanMessage(content=prompt))
+            return messages
+        static, rest = prompt.split(CACHE_BREAKPOINT, 1)
+        messages.append(HumanMessage(content=[
+            {"type": "text", "text": static + "\n", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": rest.replace(CACHE_BREAKPOINT, "\n")},
+        ]))
+        return messages
+    
     @classmethod
     def get_supported_models(cls) -> List[str]:
         """Get supported Claude models."""
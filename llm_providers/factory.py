@@ -2,12 +2,11 @@
 LLM Provider Factory - Factory pattern implementation
 """
 
-from typing import Dict, Type
+import os
+import importlib
+import threading
+from typing import Dict, Type, Union
 from .base_provider import BaseLLMProvider
-from .openai_provider import OpenAIProvider
-from .gemini_provider import GeminiProvider
-from .claude_provider import ClaudeProvider
-from .local_provider import LocalProvider
 
 
 class LLMProviderFactory:
@@ -16,17 +15,25 @@ class LLMProviderFactory:
     Implements Factory pattern for provider instantiation.
     """
     
-    _providers: Dict[str, Type[BaseLLMProvider]] = {
-        "openai": OpenAIProvider,
-        "gemini": GeminiProvider,
-        "claude": ClaudeProvider,
-        "local": LocalProvider,
+    # Built-in providers are "module:Class" paths imported on first use, so
+    # only the selected provider's module (and SDK) is ever loaded
+    _providers: Dict[str, Union[str, Type[BaseLLMProvider]]] = {
+        "openai": "llm_providers.openai_provider:OpenAIProvider",
+        "gemini": "llm_providers.gemini_provider:GeminiProvider",
+        "claude": "llm_providers.claude_provider:ClaudeProvider",
+        "local": "llm_providers.local_provider:LocalProvider",
     }
     
+    # One instance per (provider, model, config) so the underlying HTTP client
+    # and its keep-alive connections are reused across review calls
+    _instances: Dict[tuple, BaseLLMProvider] = {}
+    _instances_lock = threading.Lock()
+    
     @classmethod
     def create_provider(cls, provider_name: str, model: str = None, **kwargs) -> BaseLLMProvider:
         """
-        Create an LLM provider instance.
+        Create an LLM provider instance, reusing a previously created one
+        with the same provider, model and configuration.
         
         Args:
             provider_name: Name of the provider (openai, gemini, claude, local)
@@ -45,19 +52,25 @@ class LLMProviderFactory:
             supported = ", ".join(cls._providers.keys())
             raise ValueError(f"Unsupported provider: {provider_name}. Supported: {supported}")
         
-        provider_class = cls._providers[provider_name]
+        provider_class = cls._get_provider_class(provider_name)
         
         # Use default model if not provided
         if model is None:
-            default_models = {
-                "openai": "gpt-4",
-                "gemini": "gemini-pro", 
-                "claude": "claude-3-sonnet-20240229",
-                "local": "deepseek-r1"
-            }
-            model = default_models[provider_name]
+            model = cls._get_default_model(provider_name)
         
-        return provider_class(model=model, **kwargs)
+        key = (provider_name, model, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable configuration values: skip memoization
+            return provider_class(model=model, **kwargs)
+        # Locked so concurrent callers (e.g. review daemon threads) share one instance
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = provider_class(model=model, **kwargs)
+                cls._instances[key] = instance
+        return instance
     
     @classmethod
     def get_supported_providers(cls) -> list:
@@ -68,7 +81,8 @@ class LLMProviderFactory:
     def get_provider_info(cls) -> Dict[str, Dict]:
         """Get information about all supported providers and their models."""
         info = {}
-        for name, provider_class in cls._providers.items():
+        for name in cls._providers:
+            provider_class = cls._get_provider_class(name)
             info[name] = {
                 "name": provider_class.get_provider_name(),
                 "models": provider_class.get_supported_models(),
@@ -76,6 +90,16 @@ class LLMProviderFactory:
             }
         return info
     
+    @classmethod
+    def _get_provider_class(cls, provider_name: str) -> Type[BaseLLMProvider]:
+        """Resolve a registered provider, importing its module on first use."""
+        provider_class = cls._providers[provider_name]
+        if isinstance(provider_class, str):
+            module_name, class_name = provider_class.split(":")
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            cls._providers[provider_name] = provider_class
+        return provider_class
+    
     @classmethod
     def _get_default_model(cls, provider_name: str) -> str:
         """Get default model for provider."""
@@ -83,7 +107,8 @@ class LLMProviderFactory:
             "openai": "gpt-4",
             "gemini": "gemini-pro",
             "claude": "claude-3-sonnet-20240229", 
-            "local": "deepseek-r1"
+            # Small model: review calls are bounded summarization, and it runs fast on CPU
+            "local": os.getenv("OLLAMA_MODEL", "qwen2:1.5b")
         }
         return defaults.get(provider_name, "")
     
@@ -4,7 +4,6 @@ Google Gemini Provider Implementation
 
 import os
 from typing import List
-from langchain_google_genai import ChatGoogleGenerativeAI
 from .base_provider import BaseLLMProvider
 
 
@@ -22,6 +21,7 @@ class GeminiProvider(BaseLLMProvider):
     
     def _initialize_llm(self):
         """Initialize Gemini ChatGoogleGenerativeAI instance."""
+        from langchain_google_genai import ChatGoogleGenerativeAI
         api_key = os.getenv("GEMINI_API_KEY")
         return ChatGoogleGenerativeAI(
             model=self.model,
@@ -4,7 +4,6 @@ Local Models Provider Implementation (Ollama-based)
 
 import os
 from typing import List
-from langchain_community.llms.ollama import Ollama
 from .base_provider import BaseLLMProvider
 
 
@@ -14,6 +13,12 @@ class LocalProvider(BaseLLMProvider):
     Supports popular local models for code review.
     """
     
+    DEFAULT_OPTIONS = {
+        "num_ctx": 4096,
+        "num_predict": 1024,
+        "temperature": 0.1,
+    }
+    
     def _validate_config(self) -> bool:
         """Validate local configuration."""
         # Check if base URL is provided or use default
@@ -23,16 +28,21 @@ class LocalProvider(BaseLLMProvider):
     
     def _initialize_llm(self):
         """Initialize Ollama instance."""
+        from langchain_community.llms.ollama import Ollama
+        # Bounded context/output keep generation fast. The pinned Ollama wrapper has no keep_alive field;
+        # start_ollama.py --warm-model sets it through the HTTP API instead
+        options = {**self.DEFAULT_OPTIONS, **{k: v for k, v in self.config.items() if k != 'base_url'}}
         return Ollama(
             model=self.model,
             base_url=self.config.get('base_url', 'http://127.0.0.1:11434'),
-            **{k: v for k, v in self.config.items() if k != 'base_url'}
+            **options
         )
     
     @classmethod
     def get_supported_models(cls) -> List[str]:
         """Get supported popular local models."""
         return [
+            "qwen2:1.5b",       # Small Qwen2 - default, fast on CPU
             "deepseek-r1",      # DeepSeek R1 - excellent for code
             "llama3",           # Meta's Llama 3
             "codellama",        # Code-specific Llama
@@ -4,7 +4,6 @@ OpenAI Provider Implementation
 
 import os
 from typing import List
-from langchain_openai import ChatOpenAI
 from .base_provider import BaseLLMProvider
 
 
@@ -22,6 +21,7 @@ class OpenAIProvider(BaseLLMProvider):
     
     def _initialize_llm(self):
         """Initialize OpenAI ChatOpenAI instance."""
+        from langchain_openai import ChatOpenAI
         api_key = os.getenv("OPENAI_API_KEY")
         return ChatOpenAI(
             model=self.model,
@@ -1,40 +1,46 @@
 import os
-from tools import TOOLS
+from functools import lru_cache
+from tools import TOOLS, SKIPPED_DIRS
+_ALL_REPO_TYPES = frozenset({"python", "nodejs", "golang"})
+
+_TOOLS_BY_TYPE = {
+    "python": frozenset({"flake8", "bandit", "snyk", "mypy", "pylint"}),
+    "nodejs": frozenset({"eslint", "npm_audit", "snyk"}),
+    "golang": frozenset({"golint", "gosec", "govulncheck", "snyk"}),
+}
+_EMPTY = frozenset()
 
 def detect_repo_types(repo_path):
-    files = set(os.listdir(repo_path))
+    repo_path = os.path.abspath(repo_path)
+    # Keyed on the root's mtime so adding or removing top-level entries invalidates the result
+    return list(_detect_repo_types(repo_path, os.stat(repo_path).st_mtime_ns))
+
+@lru_cache(maxsize=16)
+def _detect_repo_types(repo_path, root_mtime):
     types = set()
-    # Python detection
-    if any(f.endswith(".py") for f in files) or "requirements.txt" in files or "pyproject.toml" in files:
-        types.add("python")
-    # Node.js detection
-    if "package.json" in files or any(f.endswith(".js") or f.endswith(".ts") for f in files):
-        types.add("nodejs")
-    # Go detection
-    if "go.mod" in files or any(f.endswith(".go") for f in files):
-        types.add("golang")
-    # Recursively check subdirectories for monorepos
-    for root, dirs, subfiles in os.walk(repo_path):
-        subfiles = set(subfiles)
-        if any(f.endswith(".py") for f in subfiles) or "requirements.txt" in subfiles or "pyproject.toml" in subfiles:
-            types.add("python")
-        if "package.json" in subfiles or any(f.endswith(".js") or f.endswith(".ts") for f in subfiles):
-            types.add("nodejs")
-        if "go.mod" in subfiles or any(f.endswith(".go") for f in subfiles):
-            types.add("golang")
+    pending = [repo_path]
+    # Walk the tree (monorepos keep sources in subdirectories), stopping once every type is found
+    while pending and not _ALL_REPO_TYPES <= types:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in SKIPPED_DIRS:
+                        pending.append(entry.path)
+                elif name.endswith(".py") or name in ("requirements.txt", "pyproject.toml"):
+                    types.add("python")
+                elif name == "package.json" or name.endswith((".js", ".ts")):
+                    types.add("nodejs")
+                elif name == "go.mod" or name.endswith(".go"):
+                    types.add("golang")
     if not types:
         types.add("unknown")
-    return list(types)
+    return tuple(sorted(types))
 
 def get_tools_for_repo_types(repo_types):
-    toolset = set()
-    for repo_type in repo_types:
-        if repo_type == "python":
-            toolset.update(["flake8", "bandit", "snyk", "mypy", "pylint"])
-        if repo_type == "nodejs":
-            toolset.update(["eslint", "npm_audit", "snyk"])
-        if repo_type == "golang":
-            toolset.update(["golint", "gosec", "govulncheck", "snyk"])
-    if not toolset:
-        toolset = set(TOOLS.keys())
-    return list(toolset) 
\ No newline at end of file
+    toolset = _EMPTY.union(*(_TOOLS_BY_TYPE.get(repo_type, _EMPTY) for repo_type in repo_types))
+    return list(toolset or TOOLS)
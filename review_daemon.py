@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Review Daemon - Long-lived code review server
+Keeps the LLM provider (and its HTTP connections or local model) warm between reviews.
+Requests are newline-delimited JSON sent over a Unix domain socket.
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import socketserver
+from json_utils import dumps_json, loads_json
+from eng_manager_review_agent import DEFAULT_CACHE_DIR, get_llm_provider, run_review_pipeline
+
+
+DEFAULT_SOCKET_PATH = os.path.expanduser("~/.em_agentic_review.sock")
+
+
+class ReviewRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one client connection.
+    
+    Each request line is a JSON object {"files": {...}, "repo_path": "/abs/path"}
+    with optional "provider", "model" and "cache_dir" overrides ("" disables the
+    cache); each response line is
+    {"comments": [...], "pr_description": "..."} or {"error": "..."}.
+    """
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                result = self.server.review(loads_json(line))
+            except Exception as e:
+                result = {"error": str(e)}
+            self.wfile.write(dumps_json(result, compact=True) + b"\n")
+            self.wfile.flush()
+
+
+class ReviewDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    
+    def __init__(self, socket_path: str, provider: str, model: str = None,
+                 cache_dir: str = DEFAULT_CACHE_DIR):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, ReviewRequestHandler)
+        self.socket_path = socket_path
+        self.provider = provider
+        self.model = model
+        # Requests name their cache by absolute path; resolve the default the same way
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else cache_dir
+        # Warm-load the provider once; the factory hands back this same instance per request
+        get_llm_provider(provider, model).get_llm()
+    
+    def review(self, request: dict) -> dict:
+        """Run the review pipeline for one request."""
+        # The daemon's working directory is unrelated to the client's checkout
+        repo_path = request.get("repo_path")
+        if not repo_path or not os.path.isabs(repo_path):
+            raise ValueError("repo_path must be an absolute path")
+        cache_dir = request.get("cache_dir", self.cache_dir)
+        if cache_dir and not os.path.isabs(cache_dir):
+            raise ValueError("cache_dir must be an absolute path")
+        return run_review_pipeline(
+            request.get("files", {}),
+            request.get("provider", self.provider),
+            request.get("model", self.model),
+            repo_path=repo_path,
+            cache_dir=cache_dir,
+        )
+    
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def request_review(files: dict, socket_path: str = DEFAULT_SOCKET_PATH, **options) -> dict:
+    """
+    Send one review request to a running daemon and wait for the answer.
+    
+    Args:
+        files: Mapping of file paths to unified diffs
+        socket_path: Daemon socket path
+        **options: Optional provider/model overrides, repo_path (default: the
+            current directory) and cache_dir ("" disables the cache, omitted uses
+            the daemon's), resolved against this process's working directory
+    
+    Returns:
+        Review result dictionary
+    
+    Raises:
+        OSError: If no daemon is listening on socket_path
+        RuntimeError: If the daemon reports an error
+    """
+    # Resolved here: the daemon runs in a different working directory
+    options["repo_path"] = os.path.abspath(options.get("repo_path", "."))
+    if options.get("cache_dir"):
+        options["cache_dir"] = os.path.abspath(options["cache_dir"])
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as stream:
+            stream.write(dumps_json({"files": files, **options}, compact=True) + b"\n")
+            stream.flush()
+            response = loads_json(stream.readline())
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
+
+
+def ensure_daemon(provider: str, model: str = None, socket_path: str = DEFAULT_SOCKET_PATH,
+                  cache_dir: str = DEFAULT_CACHE_DIR, timeout: float = 30) -> None:
+    """
+    Start a background daemon unless one is already accepting connections.
+    
+    The daemon's output goes to <socket_path>.log.
+    
+    Raises:
+        RuntimeError: If the daemon exits before it starts listening
+        TimeoutError: If it is not listening after timeout seconds
+    """
+    if _is_listening(socket_path):
+        return
+    cmd = [sys.executable, os.path.abspath(__file__), "--provider", provider, "--socket", socket_path]
+    if cache_dir is not None:
+        cmd.extend(["--cache-dir", cache_dir])
+    if model:
+        cmd.extend(["--model", model])
+    log_path = f"{socket_path}.log"
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if _is_listening(socket_path):
+            return
+        if process.poll() is not None:
+            with open(log_path, errors="replace") as log:
+                output = log.read()[-2000:].strip()
+            raise RuntimeError(f"Review daemon exited with status {process.returncode}: {output}")
+        time.sleep(0.1)
+    raise TimeoutError(f"Review daemon did not start within {timeout}s; see {log_path}")
+
+
+def _is_listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve code reviews from a long-lived process")
+    parser.add_argument("--provider", required=True, help="LLM provider (openai, gemini, claude, local)")
+    parser.add_argument("--model", help="Model name (optional)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"Unix socket path (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Review cache directory, empty to disable (default: {DEFAULT_CACHE_DIR})")
+    args = parser.parse_args()
+    
+    server = ReviewDaemon(args.socket, args.provider, args.model, args.cache_dir)
+    print(f"Review daemon listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down review daemon")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
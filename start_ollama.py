@@ -9,10 +9,15 @@ import sys
 import time
 import subprocess
 import platform
+import select
+import shutil
 import signal
 import atexit
 from pathlib import Path
 
+# Absolute path of the ollama binary, resolved once (None when not installed)
+OLLAMA_BIN = shutil.which("ollama")
+
 
 class OllamaServer:
     def __init__(self, host="127.0.0.1", port="11434"):
@@ -20,20 +25,18 @@ class OllamaServer:
         self.port = port
         self.process = None
         self.endpoint = f"http://{host}:{port}"
+        self._session = None
+        # Server version reported by /api/version once started
+        self.version = None
         
     def start(self):
         """Start Ollama server with proper configuration."""
         print(f"🚀 Starting Ollama server on {self.endpoint}")
         
-        # Set environment variables
-        env = os.environ.copy()
-        env["OLLAMA_ORIGINS"] = "*"
-        env["OLLAMA_HOST"] = f"{self.host}:{self.port}"
+        # Inherit the environment (OLLAMA_MODELS, CUDA_*, proxies, ...) with our overrides on top
+        env = {**os.environ, "OLLAMA_ORIGINS": "*", "OLLAMA_HOST": f"{self.host}:{self.port}"}
         
-        try:
-            # Check if Ollama is installed
-            subprocess.run(["ollama", "--version"], check=True, capture_output=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if OLLAMA_BIN is None:
             print("❌ Ollama is not installed. Please install it first:")
             print("   curl -fsSL https://ollama.ai/install.sh | sh")
             sys.exit(1)
@@ -43,7 +46,7 @@ class OllamaServer:
             if platform.system() == "Windows":
                 # Windows: Start process in background
                 self.process = subprocess.Popen(
-                    ["ollama", "serve"],
+                    [OLLAMA_BIN, "serve"],
                     env=env,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL,
@@ -52,7 +55,7 @@ class OllamaServer:
             else:
                 # Unix/macOS: Start process in background
                 self.process = subprocess.Popen(
-                    ["ollama", "serve"],
+                    [OLLAMA_BIN, "serve"],
                     env=env,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL,
@@ -61,8 +64,11 @@ class OllamaServer:
             
             # Wait for server to start
             self._wait_for_server()
+            self.version = self._fetch_version()
             print(f"✅ Ollama server started successfully on {self.endpoint}")
             print(f"   Process ID: {self.process.pid}")
+            if self.version:
+                print(f"   Version: {self.version}")
             
             # Register cleanup function
             atexit.register(self.stop)
@@ -73,22 +79,85 @@ class OllamaServer:
             print(f"❌ Failed to start Ollama server: {e}")
             return False
     
+    def client(self):
+        """
+        Return the pooled HTTP session for talking to this server.
+        
+        Reusing it keeps connections alive across calls instead of opening
+        a new TCP connection per request.
+        
+        Returns:
+            requests.Session with a connection pool mounted for http://
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            # Refused connections are not retried here; _wait_for_server handles startup
+            retry = Retry(total=3, connect=0, backoff_factor=0.1, status_forcelist=(502, 503, 504))
+            session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+            self._session = session
+        return self._session
+    
     def _wait_for_server(self, timeout=30):
-        """Wait for server to be ready."""
+        """Wait for server to be ready, polling with exponential backoff."""
         import requests
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        session = self.client()
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
             try:
-                response = requests.get(f"{self.endpoint}/api/tags", timeout=2)
+                response = session.get(f"{self.endpoint}/api/tags", timeout=0.5)
                 if response.status_code == 200:
                     return True
-            except:
+            except requests.RequestException:
                 pass
-            time.sleep(1)
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
         
         raise TimeoutError("Ollama server failed to start within timeout")
     
+    def warm(self, model):
+        """
+        Load a model into memory with a one-token request, so the first real
+        call does not pay the model load time.
+        
+        Args:
+            model: Name of the model to load, e.g. "qwen2:1.5b"
+        
+        Returns:
+            True if the model was loaded
+        """
+        import requests
+        
+        print(f"🔥 Warming model {model}")
+        try:
+            # keep_alive=-1 keeps the model loaded until the server stops
+            response = self.client().post(
+                f"{self.endpoint}/api/generate",
+                json={"model": model, "prompt": " ", "stream": False, "keep_alive": -1, "options": {"num_predict": 1}},
+                timeout=300,
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            print(f"⚠️  Could not warm model {model}: {e}")
+            return False
+    
+    def _fetch_version(self):
+        """Return the version reported by the running server, or None."""
+        import requests
+        
+        try:
+            response = self.client().get(f"{self.endpoint}/api/version", timeout=2)
+            response.raise_for_status()
+            return response.json().get("version")
+        except (requests.RequestException, ValueError):
+            return None
+    
     def stop(self):
         """Stop Ollama server."""
         if self.process:
@@ -100,18 +169,70 @@ class OllamaServer:
                     os.killpg(os.getpgid(self.process.pid), signal.SIGTERM)
                 
                 # Wait for process to terminate
-                self.process.wait(timeout=10)
-                print("✅ Ollama server stopped")
-            except subprocess.TimeoutExpired:
-                print("⚠️  Force killing Ollama server")
-                if platform.system() == "Windows":
-                    self.process.kill()
+                if self.wait(timeout=10):
+                    print("✅ Ollama server stopped")
                 else:
-                    os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
+                    print("⚠️  Force killing Ollama server")
+                    if platform.system() == "Windows":
+                        self.process.kill()
+                    else:
+                        os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
+                    self.process.wait()
             except Exception as e:
                 print(f"⚠️  Error stopping server: {e}")
             finally:
                 self.process = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def wait(self, timeout=None):
+        """
+        Block until the server process exits, without polling.
+        
+        Args:
+            timeout: Maximum seconds to wait (default: no limit)
+        
+        Returns:
+            True if the process has exited
+        """
+        if not self.process or self.process.poll() is not None:
+            return True
+        pid = self.process.pid
+        if hasattr(os, "pidfd_open"):
+            # Linux >= 5.3: the pidfd becomes readable when the process exits
+            try:
+                pidfd = os.pidfd_open(pid)
+            except OSError:
+                pidfd = None
+            if pidfd is not None:
+                try:
+                    poller = select.poll()
+                    poller.register(pidfd, select.POLLIN)
+                    poller.poll(None if timeout is None else int(timeout * 1000))
+                finally:
+                    os.close(pidfd)
+                return self.process.poll() is not None
+        if hasattr(select, "kqueue"):
+            # macOS/BSD: wait for the process exit event
+            kq = select.kqueue()
+            try:
+                event = select.kevent(pid, filter=select.KQ_FILTER_PROC,
+                                      flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                                      fflags=select.KQ_NOTE_EXIT)
+                kq.control([event], 1, timeout)
+            except OSError:
+                # Already exited
+                pass
+            finally:
+                kq.close()
+            return self.process.poll() is not None
+        # Elsewhere (Windows) Popen.wait blocks in the OS wait call
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
     
     def is_running(self):
         """Check if server is running."""
@@ -133,6 +254,7 @@ def main():
     parser.add_argument("--port", default="11434", help="Port to bind to (default: 11434)")
     parser.add_argument("--daemon", action="store_true", help="Run as daemon (background)")
     parser.add_argument("--pid-file", help="Write PID to file")
+    parser.add_argument("--warm-model", help="Load this model into memory right after startup")
     
     args = parser.parse_args()
     
@@ -146,6 +268,8 @@ def main():
     if args.daemon:
         # Run in background
         if server.start():
+            if args.warm_model:
+                server.warm(args.warm_model)
             print(f"Ollama server running in background on {server.endpoint}")
             print(f"To stop: kill {server.process.pid}")
         else:
@@ -154,12 +278,13 @@ def main():
         # Run in foreground
         try:
             if server.start():
+                if args.warm_model:
+                    server.warm(args.warm_model)
                 print(f"Ollama server running on {server.endpoint}")
                 print("Press Ctrl+C to stop")
                 
-                # Keep running
-                while server.is_running():
-                    time.sleep(1)
+                # Keep running until the server exits
+                server.wait()
                     
         except KeyboardInterrupt:
             print("\n🛑 Received interrupt signal")
@@ -0,0 +1,33 @@
+import asyncio
+import unittest
+
+try:
+    from llm_providers import async_runtime
+except ImportError:
+    async_runtime = None
+
+
+@unittest.skipIf(async_runtime is None, "langchain_core is not installed")
+class RunSyncTest(unittest.TestCase):
+    def test_calls_share_one_loop(self):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = async_runtime.run_sync(current_loop())
+        self.assertIs(async_runtime.run_sync(current_loop()), first)
+        self.assertTrue(first.is_running())
+
+    def test_refuses_to_block_the_shared_loop(self):
+        async def nested():
+            coro = asyncio.sleep(0)
+            try:
+                async_runtime.run_sync(coro)
+            finally:
+                coro.close()
+
+        with self.assertRaises(RuntimeError):
+            async_runtime.run_sync(nested())
+
+
+if __name__ == "__main__":
+    unittest.main()
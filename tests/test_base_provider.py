@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+
+try:
+    from llm_providers.base_provider import BaseLLMProvider
+except ImportError:
+    BaseLLMProvider = None
+
+
+class _FakeLLM:
+    def __init__(self, provider):
+        self.provider = provider
+
+    async def ainvoke(self, messages):
+        self.provider.calls += 1
+        calls = self.provider.calls
+        await asyncio.sleep(self.provider.delay)
+        return f"answer {calls}"
+
+    async def astream(self, messages):
+        self.provider.calls += 1
+        calls = self.provider.calls
+        for part in ("ans", "wer ", str(calls)):
+            await asyncio.sleep(self.provider.delay)
+            yield part
+
+
+def _fake_provider():
+    class FakeProvider(BaseLLMProvider):
+        calls = 0
+        delay = 0
+        inits = 0
+
+        def _initialize_llm(self):
+            self.inits += 1
+            return _FakeLLM(self)
+
+        def _validate_config(self):
+            return True
+
+        @classmethod
+        def get_supported_models(cls):
+            return ["fake"]
+
+        @classmethod
+        def get_provider_name(cls):
+            return "fake"
+
+    return FakeProvider("fake")
+
+
+async def _collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+@unittest.skipIf(BaseLLMProvider is None, "langchain_core is not installed")
+class InflightTest(unittest.TestCase):
+    def setUp(self):
+        self.provider = _fake_provider()
+        self.provider.delay = 0.01
+        self.provider.get_llm()
+
+    def test_concurrent_streams_share_one_call(self):
+        async def run():
+            return await asyncio.gather(
+                _collect(self.provider.ainvoke_stream("p")),
+                _collect(self.provider.ainvoke_stream("p")),
+                self.provider.ainvoke_simple("p"),
+            )
+
+        self.assertEqual(asyncio.run(run()), ["answer 1"] * 3)
+        self.assertEqual(self.provider.calls, 1)
+
+    def test_cancelled_owner_hands_off_to_waiter(self):
+        async def run():
+            owner = asyncio.ensure_future(self.provider.ainvoke_simple("p"))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(self.provider.ainvoke_simple("p"))
+            await asyncio.sleep(0)
+            owner.cancel()
+            return await waiter
+
+        self.assertEqual(asyncio.run(run()), "answer 2")
+        self.assertEqual(self.provider.calls, 2)
+        self.assertEqual(self.provider._inflight, {})
+
+    def test_owner_error_reaches_waiters(self):
+        async def fail(messages):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        self.provider.get_llm().ainvoke = fail
+
+        async def run():
+            return await asyncio.gather(
+                self.provider.ainvoke_simple("p"), self.provider.ainvoke_simple("p"), return_exceptions=True
+            )
+
+        self.assertEqual([type(e) for e in asyncio.run(run())], [RuntimeError, RuntimeError])
+
+    def test_concurrent_first_calls_build_llm_once(self):
+        provider = _fake_provider()
+
+        async def run():
+            return await asyncio.gather(*(provider.ainvoke_simple(f"p{i}") for i in range(8)))
+
+        self.assertEqual(len(asyncio.run(run())), 8)
+        self.assertEqual(provider.inits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
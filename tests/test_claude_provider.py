@@ -0,0 +1,44 @@
+import os
+import unittest
+from unittest import mock
+
+try:
+    from llm_providers.base_provider import CACHE_BREAKPOINT, BaseLLMProvider
+    from llm_providers.claude_provider import ClaudeProvider
+except ImportError:
+    ClaudeProvider = None
+
+try:
+    import langchain_anthropic
+except ImportError:
+    langchain_anthropic = None
+
+
+@unittest.skipIf(ClaudeProvider is None, "langchain_core is not installed")
+class CacheBreakpointTest(unittest.TestCase):
+    def setUp(self):
+        self.prompt = "reports and instructions" + CACHE_BREAKPOINT + "---\nFile: a.py"
+
+    def test_static_prefix_is_the_cached_block(self):
+        system, user = ClaudeProvider._build_messages(self.prompt, "system")
+        self.assertEqual(system.content, "system")
+        cached, rest = user.content
+        self.assertEqual(cached["text"], "reports and instructions\n")
+        self.assertEqual(cached["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(rest, {"type": "text", "text": "---\nFile: a.py"})
+
+    def test_other_providers_drop_the_marker(self):
+        (user,) = BaseLLMProvider._build_messages(self.prompt)
+        self.assertEqual(user.content, "reports and instructions\n---\nFile: a.py")
+
+    @unittest.skipIf(langchain_anthropic is None, "langchain_anthropic is not installed")
+    def test_request_keeps_the_content_blocks(self):
+        with mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test"}):
+            provider = ClaudeProvider("claude-3-haiku-20240307")
+            params = provider.get_llm()._format_params(messages=provider._build_messages(self.prompt, "system"))
+        self.assertEqual(params["system"], "system")
+        self.assertEqual(params["messages"][0]["content"][0]["cache_control"], {"type": "ephemeral"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from diff_generator_agent import DiffGeneratorAgent, _patch_file_path, unquote_git_path
+
+
+class PatchFilePathTest(unittest.TestCase):
+    def test_path_with_spaces(self):
+        patch = ["diff --git a/my file.py b/my file.py\n", "--- a/my file.py\t\n", "+++ b/my file.py\t\n", "@@ -1 +1 @@\n"]
+        self.assertEqual(_patch_file_path(patch), "my file.py")
+
+    def test_quoted_path(self):
+        patch = [
+            'diff --git "a/caf\\303\\251.py" "b/caf\\303\\251.py"\n',
+            '--- "a/caf\\303\\251.py"\n',
+            '+++ "b/caf\\303\\251.py"\n',
+        ]
+        self.assertEqual(_patch_file_path(patch), "café.py")
+
+    def test_deleted_file_uses_old_path(self):
+        patch = ["diff --git a/gone.py b/gone.py\n", "deleted file mode 100644\n", "--- a/gone.py\n", "+++ /dev/null\n"]
+        self.assertEqual(_patch_file_path(patch), "gone.py")
+
+    def test_pure_rename(self):
+        patch = ["diff --git a/old.py b/new name.py\n", "rename from old.py\n", "rename to new name.py\n"]
+        self.assertEqual(_patch_file_path(patch), "new name.py")
+
+    def test_header_only_binary_with_spaces(self):
+        patch = ["diff --git a/my bin.dat b/my bin.dat\n", "Binary files a/my bin.dat and b/my bin.dat differ\n"]
+        self.assertEqual(_patch_file_path(patch), "my bin.dat")
+
+    def test_unquote_escapes(self):
+        self.assertEqual(unquote_git_path('"tab\\t\\"q\\".py"'), 'tab\t"q".py')
+        self.assertEqual(unquote_git_path("plain.py"), "plain.py")
+
+
+class RunDiffTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        subprocess.run(["git", "init", "-q", self._tmp.name], check=True)
+        self.agent = DiffGeneratorAgent(self._tmp.name)
+
+    def _python(self, code):
+        return [sys.executable, "-c", code]
+
+    def test_noisy_stderr_does_not_block_stdout(self):
+        # Far more stderr than a pipe buffer holds, written before any diff output
+        code = (
+            "import sys; sys.stderr.write('warning: noisy filter\\n' * 50000); "
+            "sys.stdout.write('diff --git a/x.py b/x.py\\n--- a/x.py\\n+++ b/x.py\\n@@ -1 +1 @@\\n-a\\n+b\\n')"
+        )
+        diffs = self.agent._run_diff(self._python(code))
+        self.assertEqual(list(diffs), ["x.py"])
+
+    def test_failure_keeps_stderr(self):
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            self.agent._run_diff(self._python("import sys; sys.stderr.write('fatal: bad revision'); sys.exit(128)"))
+        self.assertEqual(caught.exception.stderr, "fatal: bad revision")
+
+    def test_messages_stay_off_stdout(self):
+        # Callers print the review JSON to stdout
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertEqual(self.agent.get_diffs_dict(mode="unstaged"), {})
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("No unstaged changes found", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import eng_manager_review_agent as agent
+    from tests.test_base_provider import _fake_provider
+except ImportError:
+    agent = None
+
+
+@unittest.skipIf(agent is None, "langchain_core is not installed")
+class ReviewCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.provider = _fake_provider()
+
+        async def no_tools(state):
+            return {}
+
+        patches = [
+            mock.patch.object(agent, "get_llm_provider", lambda *args, **kwargs: self.provider),
+            mock.patch.object(agent, "tool_agent_async", no_tools),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _review(self, cache_dir):
+        files = {"a.py": "@@ -1 +1 @@\n-x = 1\n+x = 2\n"}
+        return asyncio.run(agent.arun_review_pipeline(files, "fake", repo_path=self._tmp.name, cache_dir=cache_dir))
+
+    def test_second_run_is_served_from_the_cache(self):
+        cache_dir = os.path.join(self._tmp.name, "cache")
+        first = self._review(cache_dir)
+        calls = self.provider.calls
+        self.assertEqual(self._review(cache_dir), first)
+        self.assertEqual(self.provider.calls, calls)
+        # Another cache dir does not see these entries
+        self._review(os.path.join(self._tmp.name, "other"))
+        self.assertGreater(self.provider.calls, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+try:
+    import review_daemon
+except ImportError:
+    review_daemon = None
+
+
+@unittest.skipIf(review_daemon is None, "langchain_core is not installed")
+class ReviewDaemonTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_request_cache_dir_overrides_the_daemons(self):
+        daemon = types.SimpleNamespace(provider="local", model=None, cache_dir="/daemon/cache")
+        with mock.patch.object(review_daemon, "run_review_pipeline") as pipeline:
+            review_daemon.ReviewDaemon.review(daemon, {"repo_path": self._tmp.name})
+            review_daemon.ReviewDaemon.review(daemon, {"repo_path": self._tmp.name, "cache_dir": ""})
+        self.assertEqual([call.kwargs["cache_dir"] for call in pipeline.call_args_list], ["/daemon/cache", ""])
+        with self.assertRaises(ValueError):
+            review_daemon.ReviewDaemon.review(daemon, {"repo_path": self._tmp.name, "cache_dir": "relative"})
+
+    def test_failed_start_is_reported_with_its_output(self):
+        socket_path = os.path.join(self._tmp.name, "review.sock")
+        with self.assertRaises(RuntimeError) as caught:
+            review_daemon.ensure_daemon("no-such-provider", socket_path=socket_path, timeout=60)
+        self.assertIn("no-such-provider", str(caught.exception))
+        self.assertTrue(os.path.exists(f"{socket_path}.log"))
+
+
+if __name__ == "__main__":
+    unittest.main()
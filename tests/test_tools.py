@@ -0,0 +1,255 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import tools
+
+
+class LintIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.repo = os.path.join(self._tmp.name, "repo")
+        os.makedirs(self.repo)
+        self._old_cache_dir = tools.CACHE_DIR
+        tools.CACHE_DIR = os.path.join(self._tmp.name, "cache")
+        self.addCleanup(setattr, tools, "CACHE_DIR", self._old_cache_dir)
+        for name in ("a.py", "b.py"):
+            self._write(name, "bad\n")
+
+    def _write(self, name, content):
+        with open(os.path.join(self.repo, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def _lint(self, targets):
+        # Like flake8: a full run on "." reports "./"-prefixed paths, explicit targets do not
+        findings = []
+        for name in sorted(os.listdir(self.repo)):
+            with open(os.path.join(self.repo, name), encoding="utf-8") as f:
+                if "bad" not in f.read():
+                    continue
+            if targets == ["."]:
+                findings.append(f"./{name}:1:1: F999 bad\n")
+            elif name in targets:
+                findings.append(f"{name}:1:1: F999 bad\n")
+        return "".join(findings)
+
+    def test_fixed_finding_is_dropped(self):
+        first = tools._lint_incremental("flake8", self.repo, self._lint)
+        self.assertEqual(first, "a.py:1:1: F999 bad\nb.py:1:1: F999 bad\n")
+
+        self._write("a.py", "fixed now\n")
+        second = tools._lint_incremental("flake8", self.repo, self._lint)
+        self.assertEqual(second, "b.py:1:1: F999 bad\n")
+
+    def test_new_finding_is_merged_in_path_order(self):
+        self._write("a.py", "ok\n")
+        self.assertEqual(tools._lint_incremental("flake8", self.repo, self._lint), "b.py:1:1: F999 bad\n")
+
+        self._write("a.py", "bad again\n")
+        merged = tools._lint_incremental("flake8", self.repo, self._lint)
+        self.assertEqual(merged, "a.py:1:1: F999 bad\nb.py:1:1: F999 bad\n")
+
+
+@unittest.skipIf(sys.platform == "win32", "uses a shell script as a fake tool")
+class RunAllCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.repo = os.path.join(self._tmp.name, "repo")
+        os.makedirs(self.repo)
+        with open(os.path.join(self.repo, "main.go"), "w", encoding="utf-8") as f:
+            f.write("package main\n")
+        # Only a fake golint is on PATH; gosec is missing
+        self.bin_dir = os.path.join(self._tmp.name, "bin")
+        os.makedirs(self.bin_dir)
+        self._write_golint("main.go:1:1: finding\n")
+
+        old_cache_dir, old_path = tools.CACHE_DIR, os.environ.get("PATH", "")
+        tools.CACHE_DIR = os.path.join(self._tmp.name, "cache")
+        os.environ["PATH"] = self.bin_dir
+        tools._which.cache_clear()
+        self.addCleanup(tools._which.cache_clear)
+        self.addCleanup(os.environ.__setitem__, "PATH", old_path)
+        self.addCleanup(setattr, tools, "CACHE_DIR", old_cache_dir)
+
+    def _write_golint(self, output):
+        # The fake prints a file kept outside the repo, so changing its output changes neither key
+        output_file = os.path.join(self._tmp.name, "golint.out")
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(output)
+        path = os.path.join(self.bin_dir, "golint")
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                # Shell builtins only: PATH holds nothing but the fake tools
+                f.write(f"#!/bin/sh\nwhile IFS= read -r line; do printf '%s\\n' \"$line\"; done < '{output_file}'\n")
+            os.chmod(path, 0o755)
+
+    def _cached_runs(self):
+        directory = os.path.join(tools.CACHE_DIR, "all")
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def test_missing_tool_still_caches_whole_run(self):
+        expected = {"golint": "main.go:1:1: finding\n", "gosec": ""}
+        self.assertEqual(tools.run_all(self.repo, ["golint", "gosec"]), expected)
+        self.assertEqual(len(self._cached_runs()), 1)
+
+        # Served from the whole-run cache: the changed tool output is not seen
+        self._write_golint("changed\n")
+        self.assertEqual(tools.run_all(self.repo, ["golint", "gosec"]), expected)
+        self.assertEqual(asyncio.run(tools.run_all_async(self.repo, ["golint", "gosec"])), expected)
+        self.assertEqual(len(self._cached_runs()), 1)
+
+    def test_installing_a_tool_invalidates_the_run(self):
+        tools.run_all(self.repo, ["golint", "gosec"])
+        gosec = os.path.join(self.bin_dir, "gosec")
+        with open(gosec, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\necho issue\n")
+        os.chmod(gosec, 0o755)
+        self.assertEqual(tools.run_all(self.repo, ["golint", "gosec"])["gosec"], "issue\n")
+        self.assertEqual(len(self._cached_runs()), 2)
+
+    def test_review_cache_in_the_repo_is_ignored(self):
+        tools.run_all(self.repo, ["golint", "gosec"])
+        os.makedirs(os.path.join(self.repo, ".review_cache"))
+        with open(os.path.join(self.repo, ".review_cache", "entry.txt"), "w", encoding="utf-8") as f:
+            f.write("review\n")
+        tools.run_all(self.repo, ["golint", "gosec"])
+        self.assertEqual(len(self._cached_runs()), 1)
+
+    def _write_tool(self, name, script):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"#!/bin/sh\n{script}\n")
+        os.chmod(path, 0o755)
+
+    def test_golint_keeps_the_slices_that_finished(self):
+        os.makedirs(os.path.join(self.repo, "slow"))
+        with open(os.path.join(self.repo, "slow", "slow.go"), "w", encoding="utf-8") as f:
+            f.write("package slow\n")
+        self._write_tool("golint", 'case "$1" in *slow) while :; do :; done;; esac\necho "$1: finding"')
+        with mock.patch("os.cpu_count", return_value=2), mock.patch.dict(tools.TOOL_TIMEOUTS, {"golint": 0.5}):
+            for run in (tools.run_all, lambda *args: asyncio.run(tools.run_all_async(*args))):
+                self.assertEqual(run(self.repo, ["golint"]), {"golint": f"{self.repo}: finding\n"})
+        self.assertEqual(self._cached_runs(), [])
+
+    def test_dmypy_status_is_not_a_finding(self):
+        self._write_tool("dmypy", "echo 'Daemon started'; echo 'a.py:1: error: bad'; echo 'Found 1 error'; exit 1")
+        expected = "a.py:1: error: bad\nFound 1 error\n"
+        self.assertEqual(tools.run_mypy(self.repo), expected)
+        self.assertEqual(asyncio.run(tools.run_mypy_async(self.repo)), expected)
+
+    def test_failed_run_is_not_cached(self):
+        # e.g. an auth or network error reported on stdout with a failure status
+        self._write_tool("gosec", "echo 'error: not authenticated'; exit 2")
+        self.assertEqual(tools.run_all(self.repo, ["gosec"])["gosec"], "error: not authenticated\n")
+        self.assertEqual(self._cached_runs(), [])
+        self.assertFalse(os.path.isdir(os.path.join(tools.CACHE_DIR, "gosec")))
+
+    def test_scanner_output_expires(self):
+        self._write_tool("govulncheck", "echo advisory")
+        ttl = tools.SCANNER_CACHE_TTL["govulncheck"]
+        now = time.time() // ttl * ttl
+        with mock.patch("time.time", return_value=now):
+            tools.TOOLS["govulncheck"](self.repo)
+            tools.TOOLS["govulncheck"](self.repo)
+        self.assertEqual(len(os.listdir(os.path.join(tools.CACHE_DIR, "govulncheck"))), 1)
+        with mock.patch("time.time", return_value=now + ttl):
+            tools.TOOLS["govulncheck"](self.repo)
+        self.assertEqual(len(os.listdir(os.path.join(tools.CACHE_DIR, "govulncheck"))), 2)
+
+
+class RunAllErrorsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        old_cache_dir, old_tools, old_tools_async = tools.CACHE_DIR, tools.TOOLS, tools.TOOLS_ASYNC
+        tools.CACHE_DIR = os.path.join(self._tmp.name, "cache")
+        self.addCleanup(setattr, tools, "CACHE_DIR", old_cache_dir)
+        self.addCleanup(setattr, tools, "TOOLS", old_tools)
+        self.addCleanup(setattr, tools, "TOOLS_ASYNC", old_tools_async)
+
+        def broken(repo_path):
+            raise ValueError("unparsable report")
+
+        async def broken_async(repo_path):
+            broken(repo_path)
+
+        tools.TOOLS = {"ok": lambda repo_path: "fine", "broken": broken}
+        tools.TOOLS_ASYNC = {"broken": broken_async}
+
+    def test_sync_and_async_tolerate_the_same_errors(self):
+        self.assertEqual(tools.run_all(self._tmp.name, ["ok", "broken"]), {"ok": "fine", "broken": ""})
+        self.assertEqual(asyncio.run(tools.run_all_async(self._tmp.name, ["broken"])), {"broken": ""})
+        # A failed run is not reused
+        self.assertFalse(os.path.isdir(os.path.join(tools.CACHE_DIR, "all")))
+
+
+
+def main():
+    """Stand-in for a pooled tool's CLI entry point: fake <print|close|sleep|crash> [status]."""
+    action = sys.argv[1]
+    if action == "sleep":
+        time.sleep(60)
+    if action == "crash":
+        raise RuntimeError("crashed")
+    print("report")
+    if action == "close":
+        sys.stdout.close()
+    sys.exit(int(sys.argv[2]))
+
+
+class WorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(tools._POOLED_TOOLS, {"fake": __name__})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        if tools._pool is not None:
+            tools._discard_pool(tools._pool)
+
+    def test_output_and_exit_status(self):
+        self.assertEqual(tools._run_pooled(["fake", "print", "1"]), b"report\n")
+        self.assertEqual(tools._run_pooled(["fake", "close", "0"]), b"report\n")
+        self.assertEqual(asyncio.run(tools._run_pooled_async(["fake", "print", "0"])), b"report\n")
+        for args in (["fake", "print", "2"], ["fake", "crash"]):
+            with self.assertRaises(tools.ToolFailed):
+                tools._run_pooled(args)
+        # Failures above ran in the tool, not the worker: the same pool keeps serving
+        pool = tools._pool
+        tools._run_pooled(["fake", "print", "0"])
+        self.assertIs(tools._pool, pool)
+
+    def test_timeout_kills_the_worker(self):
+        tools._run_pooled(["fake", "print", "0"])
+        workers = list(tools._pool._processes.values())
+        with self.assertRaises(tools.ToolTimeout):
+            tools._run_pooled(["fake", "sleep"], timeout=0.5)
+        for worker in workers:
+            worker.join(5)
+            self.assertFalse(worker.is_alive())
+        # A fresh pool serves the next call
+        self.assertEqual(tools._run_pooled(["fake", "print", "0"]), b"report\n")
+
+    def test_cancelling_kills_the_worker(self):
+        async def cancel():
+            task = asyncio.ensure_future(tools._run_pooled_async(["fake", "sleep"]))
+            await asyncio.sleep(1)
+            workers = list(tools._pool._processes.values())
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return workers
+
+        for worker in asyncio.run(cancel()):
+            worker.join(5)
+            self.assertFalse(worker.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
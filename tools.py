@@ -1,78 +1,909 @@
+import io
+import os
+import re
+import sys
+import errno
+import shutil
+import signal
+import asyncio
+import hashlib
+import mmap
+import time
+import functools
+import importlib
+import importlib.metadata
+import importlib.util
+import threading
+import contextvars
 import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from types import MappingProxyType
+from json_utils import dumps_json, loads_json
 
+# Tool outputs are cached per tree state under here
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "em-reviewer")
+# Bump whenever a tool's command line changes so cached outputs are invalidated
+CACHE_VERSION = "1"
+# Entries not rewritten for this many seconds are deleted; their keys are unlikely to come back
+CACHE_MAX_AGE = 7 * 24 * 3600
+# Scanners that check against an advisory database: their output changes as advisories
+# are published, not only with the tree, so it is reused for at most this many seconds
+SCANNER_CACHE_TTL = {
+    "snyk": 3600,
+    "npm_audit": 3600,
+    "govulncheck": 3600,
+}
+
+# Directories never linted but potentially huge; skipped when scanning the tree
+SKIPPED_DIRS = frozenset({
+    "node_modules", ".git", "venv", ".venv", "__pycache__", "dist", "build", "vendor",
+    # Linters' own caches, rewritten by every run
+    ".mypy_cache", ".ruff_cache", ".pytest_cache",
+    # The review cache (eng_manager_review_agent.DEFAULT_CACHE_DIR), written during every review
+    ".review_cache",
+})
+
+_PY_INPUTS = ((".py", ".cfg", ".toml", ".ini"), frozenset({".flake8", ".pylintrc", ".bandit"}))
+_JS_INPUTS = ((".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"), frozenset({"package.json", "package-lock.json", ".eslintrc", ".eslintrc.json", ".eslintrc.js"}))
+_NPM_INPUTS = ((), frozenset({"package.json", "package-lock.json"}))
+_GO_INPUTS = ((".go",), frozenset({"go.mod", "go.sum"}))
+
+# (suffixes, file names) whose changes can alter each tool's output; None means any file
+_TOOL_INPUTS = {
+    "flake8": _PY_INPUTS,
+    "bandit": _PY_INPUTS,
+    "snyk": None,
+    "mypy": _PY_INPUTS,
+    "pylint": _PY_INPUTS,
+    "eslint": _JS_INPUTS,
+    "npm_audit": _NPM_INPUTS,
+    "golint": _GO_INPUTS,
+    "gosec": _GO_INPUTS,
+    "govulncheck": _GO_INPUTS,
+}
+
+# Seconds each tool may run before it is killed and its partial output used
+TOOL_TIMEOUTS = {
+    "flake8": 30,
+    "bandit": 60,
+    "snyk": 120,
+    "mypy": 120,
+    "pylint": 120,
+    "eslint": 60,
+    "npm_audit": 60,
+    "golint": 30,
+    "gosec": 60,
+    "govulncheck": 120,
+}
+
+# Exit statuses meaning "ran fine" (0) or "ran fine and reported findings" (1) for most tools
+_OK_EXIT_CODES = frozenset({0, 1})
+
+class ToolFailed(Exception):
+    """A tool exited with a status that signals an error (e.g. auth, network, crash); output holds what it printed."""
+    
+    def __init__(self, tool, returncode, output, message=None):
+        super().__init__(message or f"{tool} exited with status {returncode}")
+        self.output = output
+
+class ToolTimeout(ToolFailed):
+    """A tool ran past its time budget and was killed; output holds what it printed until then."""
+    
+    def __init__(self, tool, timeout, output):
+        super().__init__(tool, None, output, f"{tool} timed out after {timeout}s")
+
+# (absolute repo path, every file's (mtime_ns, size)) from one walk shared by all
+# tools of a run_all call; None outside of one, where each tool walks for itself
+_file_index = contextvars.ContextVar("file_index", default=None)
+# Names of tools in the current run_all call that failed or timed out
+_incomplete = contextvars.ContextVar("incomplete", default=None)
+
+def _matches(name, inputs):
+    return inputs is None or name.endswith(inputs[0]) or name in inputs[1]
+
+def _walk(repo_path, inputs=None):
+    """Map each file under repo_path matching inputs (relative path) to its (mtime_ns, size)."""
+    files = {}
+    pending = [repo_path]
+    while pending:
+        try:
+            scanner = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with scanner:
+            for entry in scanner:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIPPED_DIRS:
+                        pending.append(entry.path)
+                elif _matches(entry.name, inputs):
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    files[os.path.relpath(entry.path, repo_path)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+def _scan_inputs(repo_path, inputs=None):
+    """Map each file a tool reads (relative path) to its (mtime_ns, size)."""
+    index = _file_index.get()
+    if index is None or index[0] != os.path.abspath(repo_path):
+        return _walk(repo_path, inputs)
+    return {path: stat for path, stat in index[1].items() if _matches(os.path.basename(path), inputs)}
+
+def _fingerprint(repo_path, files, extra=""):
+    digest = hashlib.blake2b(os.path.abspath(repo_path).encode("utf-8"), digest_size=20)
+    if extra:
+        digest.update(f"{extra}\n".encode("utf-8"))
+    # Sorted so the fingerprint does not depend on directory iteration order
+    for path, (mtime_ns, size) in sorted(files.items()):
+        digest.update(f"{path}\0{mtime_ns}\0{size}\n".encode("utf-8", errors="surrogateescape"))
+    return digest.hexdigest()
+
+def _binary_identity(binary):
+    """Where binary resolves on PATH, with its size and mtime, which change when the tool is upgraded."""
+    path = shutil.which(binary)
+    if path is None:
+        return ""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return f"{path}@{stat.st_mtime_ns}:{stat.st_size}"
+
+def _tool_key(tool):
+    """
+    What a tool's output depends on besides the files it reads: the command
+    line (CACHE_VERSION), the installed executables and, for scanners, the
+    current SCANNER_CACHE_TTL period.
+    """
+    key = f"{CACHE_VERSION} {','.join(_binary_identity(binary) for binary in _TOOL_BINARIES.get(tool, (tool,)))}"
+    if _poolable(tool):
+        key += f" {tool}=={importlib.metadata.version(tool)}"
+    ttl = SCANNER_CACHE_TTL.get(tool)
+    if ttl:
+        key += f" {int(time.time() // ttl)}"
+    return key
+
+def _cache_paths(tool, repo_path):
+    files = _scan_inputs(repo_path, _TOOL_INPUTS.get(tool))
+    return os.path.join(CACHE_DIR, tool), f"{_fingerprint(repo_path, files, _tool_key(tool))}.out"
+
+def as_text(data):
+    """Decode raw tool output (bytes or any buffer; UTF-8, undecodable bytes replaced) where text is needed."""
+    return str(data, "utf-8", "replace")
+
+# Cache entries are raw bytes: JSON is stored and parsed without a text round trip
+def _cache_load(directory, name):
+    try:
+        with open(os.path.join(directory, name), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _cache_store(directory, name, output):
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(output)
+        os.replace(tmp_path, os.path.join(directory, name))
+    except OSError as e:
+        print(f"Warning: could not cache tool output: {e}", file=sys.stderr)
+        return
+    _evict(directory)
+
+def _evict(directory):
+    """Delete entries of directory not rewritten within CACHE_MAX_AGE (stores only happen after a tool ran, so this is cheap by comparison)."""
+    cutoff = time.time() - CACHE_MAX_AGE
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+@functools.lru_cache(maxsize=64)
+def _memo_load(directory, name):
+    """
+    In-process memo over _cache_load, so a tool asked for again in the same
+    session on an unchanged tree skips the disk read. Misses raise KeyError,
+    which lru_cache does not store.
+    """
+    output = _cache_load(directory, name)
+    if output is None:
+        raise KeyError(name)
+    return output
+
+def _mark_incomplete(tool):
+    incomplete = _incomplete.get()
+    if incomplete is not None:
+        incomplete.add(tool)
+
+def _cached(tool):
+    """Memoize a tool (sync or async) on disk and in memory, keyed on the fingerprint of the files it reads."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(repo_path):
+                # Cache reads and writes touch the disk, so they run off the event loop
+                directory, name = await asyncio.to_thread(_cache_paths, tool, repo_path)
+                try:
+                    return as_text(await asyncio.to_thread(_memo_load, directory, name))
+                except KeyError:
+                    pass
+                try:
+                    output = await fn(repo_path)
+                except ToolFailed as e:
+                    # Output of a failed or timed-out run is returned but not cached
+                    print(f"Warning: {e}; using its output uncached", file=sys.stderr)
+                    _mark_incomplete(tool)
+                    return as_text(e.output)
+                await asyncio.to_thread(_cache_store, directory, name, output.encode("utf-8"))
+                return output
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(repo_path):
+            directory, name = _cache_paths(tool, repo_path)
+            try:
+                return as_text(_memo_load(directory, name))
+            except KeyError:
+                pass
+            try:
+                output = fn(repo_path)
+            except ToolFailed as e:
+                # Output of a failed or timed-out run is returned but not cached
+                print(f"Warning: {e}; using its output uncached", file=sys.stderr)
+                _mark_incomplete(tool)
+                return as_text(e.output)
+            _cache_store(directory, name, output.encode("utf-8"))
+            return output
+        return wrapper
+    return decorator
+
+@functools.lru_cache(maxsize=None)
+def _which(name):
+    """
+    Absolute path of a tool on PATH, resolved once per process.
+    
+    Launching by absolute path lets subprocess use posix_spawn instead of
+    fork + execvp searching PATH on every run.
+    """
+    path = shutil.which(name)
+    if path is None:
+        raise FileNotFoundError(errno.ENOENT, f"{name} not found on PATH", name)
+    return os.path.abspath(path)
+
+def _kill_tree(proc):
+    """Kill a tool together with any processes it started (it leads its own session on POSIX)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+def _run_to_file(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    """
+    Run a tool with stdout written straight into an anonymous file (a memfd on
+    Linux, an unlinked temp file elsewhere) instead of a pipe, and return that
+    file rewound to the start. The caller closes it.
+    
+    Raises:
+        ToolTimeout: If the tool ran longer than timeout seconds
+        ToolFailed: If the tool exited with a status not in ok_codes
+    """
+    out = os.fdopen(os.memfd_create("tool-output"), "w+b") if hasattr(os, "memfd_create") else tempfile.TemporaryFile()
+    try:
+        with subprocess.Popen([_which(args[0]), *args[1:]], cwd=cwd, stdout=out,
+                              stderr=subprocess.DEVNULL, start_new_session=True) as proc:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_tree(proc)
+                proc.wait()
+                out.seek(0)
+                raise ToolTimeout(args[0], timeout, out.read())
+        out.seek(0)
+        if proc.returncode not in ok_codes:
+            raise ToolFailed(args[0], proc.returncode, out.read())
+        return out
+    except BaseException:
+        out.close()
+        raise
+
+def _run_bytes(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    """
+    Run a tool and return its raw stdout.
+    
+    Raises:
+        ToolTimeout: If the tool ran longer than timeout seconds
+        ToolFailed: If the tool exited with a status not in ok_codes
+    """
+    with _run_to_file(args, cwd, timeout, ok_codes) as out:
+        return out.read()
+
+def _run(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    """Run a tool and return its stdout, read as raw bytes and decoded once at the end."""
+    return as_text(_run_bytes(args, cwd, timeout, ok_codes))
+
+def _compact_json(raw):
+    """
+    Parse a JSON report straight from the raw bytes and re-serialize it without
+    indentation, so pretty-printed reports cost fewer prompt tokens.
+    Output that is not JSON (e.g. a tool's error message) is decoded as-is.
+    """
+    try:
+        return dumps_json(loads_json(raw), compact=True).decode("utf-8")
+    except (ValueError, TypeError):
+        return as_text(raw)
+
+def _run_json(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    """Run a tool that prints a JSON report and return the report compacted."""
+    with _run_to_file(args, cwd, timeout, ok_codes) as out:
+        size = os.fstat(out.fileno()).st_size
+        if not size:
+            return ""
+        # Parse from the mapped file without first copying it into a bytes object
+        with mmap.mmap(out.fileno(), size, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return _compact_json(view)
+
+# Python tools run by a pool of long-lived worker processes that import them
+# once, instead of paying interpreter start-up and imports on every run.
+# Only bandit: flake8 runs as ruff, dmypy already keeps mypy warm, and a
+# long-lived pylint (astroid) caches modules by name and would report stale code.
+_POOLED_TOOLS = {"bandit": "bandit.cli.main"}
+# Enough for reviews of a few repositories at once; workers start on first use
+POOL_WORKERS = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _poolable(tool):
+    """Whether tool is pooled and importable by this interpreter (otherwise it runs as a subprocess)."""
+    module = _POOLED_TOOLS.get(tool)
+    return module is not None and importlib.util.find_spec(module.split(".")[0]) is not None
+
+class _Unclosable(io.BytesIO):
+    """Captured stdout that survives the tool closing it (bandit closes its report stream)."""
+    
+    name = "<stdout>"
+    
+    def close(self):
+        pass
+
+def _preimport():
+    """Pool worker initializer: discard stderr as subprocess runs do, and import the tools once."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    for module in _POOLED_TOOLS.values():
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+def _pooled_main(module, args, cwd):
+    """
+    Run module.main() in a pool worker as if launched with args.
+    
+    Returns:
+        (exit status, or None if the tool crashed; raw stdout)
+    """
+    buffer = _Unclosable()
+    saved = sys.stdout, sys.argv, os.getcwd()
+    sys.stdout, sys.argv = io.TextIOWrapper(buffer, encoding="utf-8"), list(args)
+    try:
+        if cwd:
+            os.chdir(cwd)
+        try:
+            importlib.import_module(module).main()
+            status = 0
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            status = None
+        try:
+            sys.stdout.flush()
+        except ValueError:
+            pass  # Closed by the tool, which flushes first
+    finally:
+        sys.stdout, sys.argv = saved[:2]
+        os.chdir(saved[2])
+    return status, buffer.getvalue()
+
+def _submit_pooled(args, cwd):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Not fork: the reviewer runs event loop and worker threads
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context(method),
+                                        initializer=_preimport)
+        return _pool, _pool.submit(_pooled_main, _POOLED_TOOLS[args[0]], args, cwd)
+
+def _discard_pool(pool):
+    """Kill pool's workers (a call ran past its budget or is no longer wanted); the next call starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _pooled_result(args, status, output, ok_codes):
+    if status is None:
+        raise ToolFailed(args[0], None, output, f"{args[0]} crashed")
+    if status not in ok_codes:
+        raise ToolFailed(args[0], status, output)
+    return output
+
+def _run_pooled(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    """
+    Run a pooled tool in a warm worker and return its raw stdout.
+    
+    Raises:
+        ToolTimeout: If the tool ran longer than timeout seconds (its output is lost with the worker)
+        ToolFailed: If the tool exited with a status not in ok_codes, or its worker died
+    """
+    pool, future = _submit_pooled(args, cwd)
+    try:
+        return _pooled_result(args, *future.result(timeout), ok_codes)
+    except FutureTimeoutError:
+        _discard_pool(pool)
+        raise ToolTimeout(args[0], timeout, b"")
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise ToolFailed(args[0], None, b"", f"{args[0]} worker process died")
+
+# Above this many changed files a full run is as cheap as an incremental one
+MAX_INCREMENTAL_FILES = 200
+
+def _finding_path(line):
+    # "./a.py" (flake8 on ".") and "a.py" (explicit targets) name the same file
+    return os.path.normpath(line.split(":", 1)[0])
+
+def _normalize_findings(output):
+    """Keep only "path:line:col: message" lines, with normalized relative paths."""
+    findings = []
+    for line in output.splitlines(keepends=True):
+        # Drop summaries such as "Found N errors."; only per-file findings can be merged
+        if ":" not in line.split(" ", 1)[0]:
+            continue
+        path, rest = line.split(":", 1)
+        findings.append(f"{os.path.normpath(path)}:{rest}")
+    return findings
+
+def _lint_incremental(tool, repo_path, lint):
+    """
+    Re-lint only the files changed since the previous run of tool on repo_path.
+    
+    lint(targets) runs the linter from repo_path on the given relative paths
+    (["."] for the whole tree) and returns "path:line:col: message" lines.
+    Findings for unchanged files are carried over from the previous run.
+    Config changes, a cold cache or a large change set trigger a full run.
+    """
+    files = _scan_inputs(repo_path, _TOOL_INPUTS[tool])
+    state_dir = os.path.join(CACHE_DIR, tool, "incremental")
+    state_name = f"{hashlib.blake2b(os.path.abspath(repo_path).encode('utf-8'), digest_size=20).hexdigest()}.json"
+    previous = _cache_load(state_dir, state_name)
+    previous = loads_json(previous) if previous else None
+    
+    output = None
+    if previous is not None:
+        old_files = {path: tuple(stat) for path, stat in previous["files"].items()}
+        changed = sorted(path for path, stat in files.items() if old_files.get(path) != stat)
+        stale = set(changed) | (old_files.keys() - files.keys())
+        config_changed = any(not path.endswith(".py") for path in stale)
+        if not stale:
+            output = previous["output"]
+        elif not config_changed and len(changed) <= MAX_INCREMENTAL_FILES:
+            kept = [line for line in _normalize_findings(previous["output"]) if _finding_path(line) not in stale]
+            fresh = _normalize_findings(lint(changed)) if changed else []
+            # Stable sort by path keeps each file's findings in linter order
+            output = "".join(sorted(kept + fresh, key=_finding_path))
+    if output is None:
+        output = "".join(_normalize_findings(lint(["."])))
+    _cache_store(state_dir, state_name, dumps_json({"files": files, "output": output}, compact=True))
+    return output
+
+def _lint_python(repo_path, targets):
+    try:
+        return _run(["ruff", "check", "--output-format=concise", "--select", "E,F,W", *targets],
+                    cwd=repo_path, timeout=TOOL_TIMEOUTS["flake8"])
+    except FileNotFoundError:
+        return _run(["flake8", "-j", "auto", "--select=E,F,W", *targets], cwd=repo_path, timeout=TOOL_TIMEOUTS["flake8"])
+
+# Python: ruff (flake8's pyflakes/pycodestyle rules, far faster); flake8 if ruff is not installed.
+# Incremental: only files changed since the last run are re-linted.
 def run_flake8(repo_path):
-    result = subprocess.run([
-        "flake8", repo_path
-    ], capture_output=True, text=True)
-    return result.stdout
+    return _lint_incremental("flake8", repo_path, functools.partial(_lint_python, repo_path))
 
 def run_bandit(repo_path):
-    result = subprocess.run([
-        "bandit", "-r", repo_path, "-f", "json"
-    ], capture_output=True, text=True)
-    return result.stdout
+    args = ["bandit", "-r", repo_path, "-f", "json"]
+    if _poolable("bandit"):
+        return _compact_json(_run_pooled(args, timeout=TOOL_TIMEOUTS["bandit"]))
+    return _run_json(args, timeout=TOOL_TIMEOUTS["bandit"])
 
 def run_snyk(repo_path):
-    result = subprocess.run([
-        "snyk", "test", repo_path, "--json"
-    ], capture_output=True, text=True)
-    return result.stdout
+    return _run_json(["snyk", "test", repo_path, "--json"], timeout=TOOL_TIMEOUTS["snyk"])
 
-# Python: mypy (type checking)
+# Idle mypy daemons shut themselves down after this many seconds
+DMYPY_IDLE_TIMEOUT = 1800
+
+def _dmypy_args(repo_path):
+    """
+    Command that type-checks repo_path through a mypy daemon kept per repository.
+    
+    The daemon keeps mypy loaded with its analysis in memory, so repeat runs
+    skip interpreter start-up and only re-check changed modules. Its status
+    file lives in CACHE_DIR rather than in the repository.
+    """
+    directory = os.path.join(CACHE_DIR, "dmypy")
+    os.makedirs(directory, exist_ok=True)
+    status_file = os.path.join(
+        directory, f"{hashlib.blake2b(os.path.abspath(repo_path).encode('utf-8'), digest_size=20).hexdigest()}.json"
+    )
+    return ["dmypy", "--status-file", status_file, "run", "--timeout", str(DMYPY_IDLE_TIMEOUT), "--", repo_path]
+
+# What dmypy run prints about the daemon itself when it (re)starts one; not a finding
+_DMYPY_STATUS_LINE = re.compile(r"^(?:Daemon (?:started|stopped)|Restarting: .*)\n", re.MULTILINE)
+
+# Python: mypy (type checking), through dmypy; plain mypy if dmypy is not installed
 def run_mypy(repo_path):
-    result = subprocess.run([
-        "mypy", repo_path
-    ], capture_output=True, text=True)
-    return result.stdout
+    try:
+        output = _run(_dmypy_args(repo_path), timeout=TOOL_TIMEOUTS["mypy"])
+    except FileNotFoundError:
+        return _run(["mypy", repo_path], timeout=TOOL_TIMEOUTS["mypy"])
+    return _DMYPY_STATUS_LINE.sub("", output)
+
+# pylint's exit status is a bit mask; only 1 (fatal) and 32 (usage error) mean the run failed
+_PYLINT_OK_EXIT_CODES = frozenset(code for code in range(64) if not code & 0b100001)
 
 # Python: pylint (linting, code quality)
 def run_pylint(repo_path):
-    result = subprocess.run([
-        "pylint", repo_path
-    ], capture_output=True, text=True)
-    return result.stdout
+    return _run(["pylint", "-j", "0", repo_path], timeout=TOOL_TIMEOUTS["pylint"], ok_codes=_PYLINT_OK_EXIT_CODES)
 
 # Node.js: eslint (linting)
 def run_eslint(repo_path):
-    result = subprocess.run([
-        "npx", "eslint", repo_path, "--format", "json"
-    ], capture_output=True, text=True)
-    return result.stdout
+    return _run_json(["npx", "eslint", repo_path, "--format", "json"], timeout=TOOL_TIMEOUTS["eslint"])
 
 # Node.js: npm audit (vulnerability check)
 def run_npm_audit(repo_path):
-    result = subprocess.run([
-        "npm", "audit", "--json"], cwd=repo_path, capture_output=True, text=True)
-    return result.stdout
+    return _run_json(["npm", "audit", "--json"], cwd=repo_path, timeout=TOOL_TIMEOUTS["npm_audit"])
+
+def _go_package_dirs(repo_path):
+    """Directories under repo_path holding .go files, i.e. the Go packages to lint."""
+    files = _scan_inputs(repo_path, ((".go",), frozenset()))
+    return sorted({os.path.normpath(os.path.join(repo_path, os.path.dirname(path))) for path in files})
 
-# Go: golint (linting)
+def _split(targets):
+    """Deal targets into one slice per CPU (fewer if there are fewer targets)."""
+    n = min(len(targets), os.cpu_count() or 1)
+    return [targets[i::n] for i in range(n)]
+
+def _golint_chunk(chunk):
+    """(output, error) of golint on one slice of packages; a ToolFailed is returned, not raised."""
+    try:
+        return _run(["golint", *chunk], timeout=TOOL_TIMEOUTS["golint"]), None
+    except ToolFailed as e:
+        return as_text(e.output), e
+
+def _join_golint(results):
+    """
+    Join the (output, error) pairs of every golint slice.
+    
+    A slice that timed out is left out (its output stops mid-report); the
+    others are kept. If any slice failed, the joined output is raised as a
+    ToolFailed so the run is used but not cached.
+    """
+    output = "".join(out for out, error in results if not isinstance(error, ToolTimeout))
+    failed = [error for _, error in results if error is not None]
+    if failed:
+        raise ToolFailed("golint", None, output.encode("utf-8"),
+                         f"golint failed on {len(failed)} of {len(results)} package groups ({failed[0]})")
+    return output
+
+# Go: golint (linting). Single-threaded, so packages are split across one process per CPU.
 def run_golint(repo_path):
-    result = subprocess.run([
-        "golint", repo_path
-    ], capture_output=True, text=True)
-    return result.stdout
+    targets = _go_package_dirs(repo_path)
+    if not targets:
+        return ""
+    chunks = _split(targets)
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        return _join_golint(list(executor.map(_golint_chunk, chunks)))
 
 # Go: gosec (security)
 def run_gosec(repo_path):
-    result = subprocess.run([
-        "gosec", "./..."], cwd=repo_path, capture_output=True, text=True)
-    return result.stdout
+    return _run(["gosec", "./..."], cwd=repo_path, timeout=TOOL_TIMEOUTS["gosec"])
+
+# govulncheck exits with 3 when it found vulnerabilities and 1 on errors
+_GOVULNCHECK_OK_EXIT_CODES = frozenset({0, 3})
 
 # Go: govulncheck (vulnerability check)
 def run_govulncheck(repo_path):
-    result = subprocess.run([
-        "govulncheck", "./..."], cwd=repo_path, capture_output=True, text=True)
-    return result.stdout
-
-TOOLS = {
-    "flake8": run_flake8,
-    "bandit": run_bandit,
-    "snyk": run_snyk,
-    "mypy": run_mypy,
-    "pylint": run_pylint,
-    "eslint": run_eslint,
-    "npm_audit": run_npm_audit,
-    "golint": run_golint,
-    "gosec": run_gosec,
-    "govulncheck": run_govulncheck,
-} 
\ No newline at end of file
+    return _run(["govulncheck", "./..."], cwd=repo_path, timeout=TOOL_TIMEOUTS["govulncheck"],
+                ok_codes=_GOVULNCHECK_OK_EXIT_CODES)
+
+# Read-only: the tool registry is fixed at import. Entries reuse cached output
+# while the files each tool reads are unchanged.
+TOOLS = MappingProxyType({
+    "flake8": _cached("flake8")(run_flake8),
+    "bandit": _cached("bandit")(run_bandit),
+    "snyk": _cached("snyk")(run_snyk),
+    "mypy": _cached("mypy")(run_mypy),
+    "pylint": _cached("pylint")(run_pylint),
+    "eslint": _cached("eslint")(run_eslint),
+    "npm_audit": _cached("npm_audit")(run_npm_audit),
+    "golint": _cached("golint")(run_golint),
+    "gosec": _cached("gosec")(run_gosec),
+    "govulncheck": _cached("govulncheck")(run_govulncheck),
+})
+
+# Executables each tool may launch, in order of preference
+_TOOL_BINARIES = {
+    "flake8": ("ruff", "flake8"),
+    "mypy": ("dmypy", "mypy"),
+    "eslint": ("npx",),
+    "npm_audit": ("npm",),
+}
+
+def _prepare_run_all(repo_path, names):
+    """
+    Walk the tree once and locate the cached result of a whole run_all call.
+    
+    The key covers the tree state, the tool set and each tool's _tool_key
+    (executables on PATH, scanner TTL period), so a missing tool (empty
+    output) is a cacheable result that is invalidated once the tool is
+    installed or upgraded.
+    
+    Returns:
+        (files, cache directory, cache file name)
+    """
+    files = _walk(repo_path)
+    tool_keys = " ".join(f"{name}={_tool_key(name)}" for name in sorted(names))
+    return files, os.path.join(CACHE_DIR, "all"), f"{_fingerprint(repo_path, files, tool_keys)}.json"
+
+# Errors that leave one tool's output empty rather than failing the whole run:
+# a missing or unrunnable binary, or a report that could not be parsed
+_TOOL_ERRORS = (OSError, ValueError)
+
+def _tool_failed(name, error):
+    """Report a tool that could not run and return its (empty) output."""
+    print(f"Warning: {name} failed to run: {error}", file=sys.stderr)
+    # A missing tool reliably yields nothing; other failures may be transient
+    if not isinstance(error, FileNotFoundError):
+        _mark_incomplete(name)
+    return ""
+
+def run_all(repo_path, tools=None):
+    """
+    Run several tools concurrently and collect their output.
+    
+    Each tool is a separate OS process, so threads only wait on I/O and the
+    wall time is that of the slowest tool rather than the sum. The tree is
+    walked once up front and that index is shared by every tool's cache check.
+    If no file changed since a complete run of the same tools, that run's
+    results are returned without checking each tool. A tool that is not
+    installed yields empty output; only timeouts and other failures keep
+    the run from being reused.
+    
+    Args:
+        repo_path: Repository to analyze
+        tools: Tool names to run (default: every tool in TOOLS)
+        
+    Returns:
+        Mapping of tool name to its output
+    """
+    names = list(TOOLS) if tools is None else list(tools)
+    if not names:
+        return {}
+    files, directory, cache_name = _prepare_run_all(repo_path, names)
+    try:
+        return loads_json(_memo_load(directory, cache_name))
+    except KeyError:
+        pass
+    results = {}
+    incomplete = set()
+    token = _file_index.set((os.path.abspath(repo_path), files))
+    incomplete_token = _incomplete.set(incomplete)
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(names), os.cpu_count() or 4)) as executor:
+            # Each worker runs in a copy of this context so it sees the shared file index
+            futures = {
+                executor.submit(contextvars.copy_context().run, TOOLS[name], repo_path): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except _TOOL_ERRORS as e:
+                    results[name] = _tool_failed(name, e)
+    finally:
+        _incomplete.reset(incomplete_token)
+        _file_index.reset(token)
+    if not incomplete:
+        _cache_store(directory, cache_name, dumps_json(results, compact=True))
+    return results
+
+# Async variants: all tools can be awaited together on one event loop without a thread each
+async def _run_bytes_async(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    proc = await asyncio.create_subprocess_exec(
+        _which(args[0]), *args[1:], cwd=cwd, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL, start_new_session=True
+    )
+    chunks = []
+    
+    async def read():
+        # Read incrementally so the output so far survives a timeout
+        while True:
+            chunk = await proc.stdout.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        await proc.wait()
+    
+    try:
+        await asyncio.wait_for(read(), timeout)
+    except asyncio.TimeoutError:
+        _kill_tree(proc)
+        await proc.wait()
+        raise ToolTimeout(args[0], timeout, b"".join(chunks))
+    except asyncio.CancelledError:
+        # Do not leave the linter running when its result is no longer wanted
+        if proc.returncode is None:
+            _kill_tree(proc)
+            await proc.wait()
+        raise
+    if proc.returncode not in ok_codes:
+        raise ToolFailed(args[0], proc.returncode, b"".join(chunks))
+    return b"".join(chunks)
+
+async def _run_async(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    return as_text(await _run_bytes_async(args, cwd, timeout, ok_codes))
+
+async def _run_json_async(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    return _compact_json(await _run_bytes_async(args, cwd, timeout, ok_codes))
+
+async def _run_pooled_async(args, cwd=None, timeout=None, ok_codes=_OK_EXIT_CODES):
+    # Submitting may start the pool's first worker, so it happens off the event loop
+    pool, future = await asyncio.to_thread(_submit_pooled, args, cwd)
+    try:
+        return _pooled_result(args, *await asyncio.wait_for(asyncio.wrap_future(future), timeout), ok_codes)
+    except asyncio.TimeoutError:
+        _discard_pool(pool)
+        raise ToolTimeout(args[0], timeout, b"")
+    except asyncio.CancelledError:
+        # Do not leave the linter running when its result is no longer wanted
+        _discard_pool(pool)
+        raise
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise ToolFailed(args[0], None, b"", f"{args[0]} worker process died")
+
+async def run_flake8_async(repo_path):
+    # The incremental bookkeeping is blocking file I/O, so it runs off the event loop
+    return await asyncio.to_thread(run_flake8, repo_path)
+
+async def run_bandit_async(repo_path):
+    args = ["bandit", "-r", repo_path, "-f", "json"]
+    if _poolable("bandit"):
+        return _compact_json(await _run_pooled_async(args, timeout=TOOL_TIMEOUTS["bandit"]))
+    return await _run_json_async(args, timeout=TOOL_TIMEOUTS["bandit"])
+
+async def run_snyk_async(repo_path):
+    return await _run_json_async(["snyk", "test", repo_path, "--json"], timeout=TOOL_TIMEOUTS["snyk"])
+
+async def run_mypy_async(repo_path):
+    try:
+        args = await asyncio.to_thread(_dmypy_args, repo_path)
+        output = await _run_async(args, timeout=TOOL_TIMEOUTS["mypy"])
+    except FileNotFoundError:
+        return await _run_async(["mypy", repo_path], timeout=TOOL_TIMEOUTS["mypy"])
+    return _DMYPY_STATUS_LINE.sub("", output)
+
+async def run_pylint_async(repo_path):
+    return await _run_async(["pylint", "-j", "0", repo_path], timeout=TOOL_TIMEOUTS["pylint"], ok_codes=_PYLINT_OK_EXIT_CODES)
+
+async def run_eslint_async(repo_path):
+    return await _run_json_async(["npx", "eslint", repo_path, "--format", "json"], timeout=TOOL_TIMEOUTS["eslint"])
+
+async def run_npm_audit_async(repo_path):
+    return await _run_json_async(["npm", "audit", "--json"], cwd=repo_path, timeout=TOOL_TIMEOUTS["npm_audit"])
+
+async def _golint_chunk_async(chunk):
+    try:
+        return await _run_async(["golint", *chunk], timeout=TOOL_TIMEOUTS["golint"]), None
+    except ToolFailed as e:
+        return as_text(e.output), e
+
+async def run_golint_async(repo_path):
+    targets = await asyncio.to_thread(_go_package_dirs, repo_path)
+    if not targets:
+        return ""
+    tasks = [asyncio.ensure_future(_golint_chunk_async(chunk)) for chunk in _split(targets)]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # gather does not cancel the other slices when one raises; cancelling kills their golint
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return _join_golint(results)
+
+async def run_gosec_async(repo_path):
+    return await _run_async(["gosec", "./..."], cwd=repo_path, timeout=TOOL_TIMEOUTS["gosec"])
+
+async def run_govulncheck_async(repo_path):
+    return await _run_async(["govulncheck", "./..."], cwd=repo_path, timeout=TOOL_TIMEOUTS["govulncheck"],
+                            ok_codes=_GOVULNCHECK_OK_EXIT_CODES)
+
+TOOLS_ASYNC = MappingProxyType({
+    "flake8": _cached("flake8")(run_flake8_async),
+    "bandit": _cached("bandit")(run_bandit_async),
+    "snyk": _cached("snyk")(run_snyk_async),
+    "mypy": _cached("mypy")(run_mypy_async),
+    "pylint": _cached("pylint")(run_pylint_async),
+    "eslint": _cached("eslint")(run_eslint_async),
+    "npm_audit": _cached("npm_audit")(run_npm_audit_async),
+    "golint": _cached("golint")(run_golint_async),
+    "gosec": _cached("gosec")(run_gosec_async),
+    "govulncheck": _cached("govulncheck")(run_govulncheck_async),
+})
+
+
+async def _run_tool_async(name, repo_path):
+    try:
+        return await TOOLS_ASYNC[name](repo_path)
+    except _TOOL_ERRORS as e:
+        return _tool_failed(name, e)
+
+async def run_all_async(repo_path, tools=None):
+    """
+    Run several tools concurrently from one event loop and collect their output.
+    
+    Every tool is an asyncio subprocess awaited with gather, so no thread is
+    held per tool. The tree is walked once and shared, and unchanged trees
+    reuse a complete previous run, like in run_all.
+    Cancelling the returned coroutine kills the tools still running.
+    
+    Args:
+        repo_path: Repository to analyze
+        tools: Tool names to run (default: every tool in TOOLS_ASYNC)
+        
+    Returns:
+        Mapping of tool name to its output
+    """
+    names = list(TOOLS_ASYNC) if tools is None else list(tools)
+    if not names:
+        return {}
+    files, directory, cache_name = await asyncio.to_thread(_prepare_run_all, repo_path, names)
+    try:
+        return loads_json(await asyncio.to_thread(_memo_load, directory, cache_name))
+    except KeyError:
+        pass
+    incomplete = set()
+    token = _file_index.set((os.path.abspath(repo_path), files))
+    incomplete_token = _incomplete.set(incomplete)
+    try:
+        # gather copies the current context into each task, file index included
+        outputs = await asyncio.gather(*(_run_tool_async(name, repo_path) for name in names))
+    finally:
+        _incomplete.reset(incomplete_token)
+        _file_index.reset(token)
+    results = dict(zip(names, outputs))
+    if not incomplete:
+        await asyncio.to_thread(_cache_store, directory, cache_name, dumps_json(results, compact=True))
+    return results